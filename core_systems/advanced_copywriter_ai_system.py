@@ -7,22 +7,46 @@ Advanced Copywriter AI System - Production Ready
 """
 
 import json
-import sqlite3
-import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Sequence
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import re
-from collections import Counter
+import sqlite3
+from collections import Counter, OrderedDict
 import logging
 import asyncio
+import gc
+import hashlib
+import multiprocessing
+import sys
+import threading
+import time
+
+from copy_database import get_copy_database
+from tokenizer_service import get_tokenizer_service
+from lexicon_matcher import LexiconMatcher
+from style_artifact import StyleAnalysisArtifact
+from example_index import ExampleIndex, build_query
+from generation_cache import GenerationCache
+from persona_snapshot import (
+    PersonaSnapshot, analysis_version, database_version, file_version, process_memory_usage,
+    write_persona_snapshot
+)
+from lazy_imports import lazy_import, module_available
+
+# Claude API用（実際のAPIキーが必要、クライアント作成時まで読み込まない）
+ANTHROPIC_AVAILABLE = module_available('anthropic')
+anthropic = lazy_import('anthropic')
+
+# Claude APIの同時接続数（HTTP接続プールの上限）と同時実行リクエスト数の既定値
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_CONCURRENCY = 64
 
-# Claude API用（実際のAPIキーが必要）
-try:
-    import anthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ANTHROPIC_AVAILABLE = False
+# 生成に使うClaudeモデル
+CLAUDE_MODEL = "claude-3-5-sonnet-20241022"
+
+# 生成プロンプトのバージョン（プロンプト構築・結果の解析を変えたら上げる。生成結果キャッシュのキーに含める）
+PROMPT_VERSION = 1
 
 @dataclass
 class AdvancedCopywritingRequest:
@@ -72,88 +96,246 @@ class AdvancedCopywritingResult:
     confidence_score: float
     recommended_usage: List[str]
 
+@dataclass
+class BatchGenerationItem:
+    """一括生成の1件分の結果（失敗した場合はerrorに理由を保持）"""
+    index: int
+    request: AdvancedCopywritingRequest
+    result: Optional[AdvancedCopywritingResult] = None
+    error: Optional[str] = None
+    error_type: Optional[str] = None
+    elapsed: float = 0.0
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def format_work_examples(works: List[Dict]) -> str:
+    """プロンプト用の作品例テキスト"""
+    work_examples = ""
+    if works:
+        work_examples = "実際の作品例:\n"
+        for i, work in enumerate(works, 1):
+            work_examples += f"{i}. 「{work['copy_text']}」（{work.get('client', '不明')}・{work.get('year', '不明')}年）\n"
+    return work_examples
+
+# 構築済みペルソナを保持する上限数
+DEFAULT_PERSONA_CACHE_SIZE = 32
+
+# ペルソナごとの実作品サンプル数
+MAX_WORK_SAMPLES = 5
+
+# 作品例検索インデックスに含める作品数の上限
+MAX_INDEXED_WORKS = 500
+
+# プロンプトに含める作品例の数
+PROMPT_EXAMPLE_COUNT = 3
+
+# コピーライター別の作品取得に使う索引（tcc_data_scraper が作成するものと同じ）
+WORK_INDEX_NAME = 'idx_copy_works_copywriter'
+
+# ペルソナ構築ロジックのバージョン（構築内容を変えたら上げ、既存スナップショットを無効にする）
+PERSONA_BUILD_VERSION = 3
+
 class PersonaDatabase:
-    """強化されたペルソナデータベース"""
+    """強化されたペルソナデータベース
+    
+    ペルソナは初回の get_persona で構築し、最大 max_personas 件をLRUで保持する。
+    作品例検索インデックスはペルソナとは別に、初回の get_example_index で作品DBから構築して同じ件数まで保持する。
+    snapshot_path に最新のペルソナスナップショットがあれば、DB・分析結果の代わりにそこから読み込む。
+    verify_snapshot=False はスナップショットを共有する複数のワーカープロセス向けで、
+    生成元との照合（DBへの問い合わせ）を省略し、スナップショットファイルの更新だけを監視する
+    """
     
-    def __init__(self, db_path: str, analysis_data_path: str):
+    def __init__(self, db_path: str, analysis_data_path: str,
+                 max_personas: int = DEFAULT_PERSONA_CACHE_SIZE, snapshot_path: Optional[str] = None,
+                 verify_snapshot: bool = True):
         self.db_path = db_path
+        self.db = get_copy_database(db_path)
+        self.tokenizer = get_tokenizer_service()
         self.analysis_data_path = analysis_data_path
+        self.snapshot_path = snapshot_path
+        self.verify_snapshot = verify_snapshot
+        
+        # 構築済みペルソナのLRU
+        self.max_personas = max_personas
+        self._personas: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._persona_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        # 作品例検索インデックスのLRU（作品が無いコピーライターはNone）
+        self._example_indexes: 'OrderedDict[str, Optional[ExampleIndex]]' = OrderedDict()
+        
         self.load_enhanced_personas()
     
     def load_enhanced_personas(self):
         """強化されたペルソナデータの読み込み"""
-        # スタイル分析結果の読み込み
+        self.snapshot = None
+        self.analysis_artifact = None
+        
+        # 読み込み時点の生成元バージョン（ホットリロードの変更検知にも使う）
+        self.loaded_at = datetime.now().isoformat()
+        self.snapshot_version = file_version(self.snapshot_path) if self.snapshot_path else None
+        
+        # 照合なしの場合はスナップショットの記録をそのまま使う
+        if self.snapshot_path and not self.verify_snapshot and self.load_snapshot(verify=False):
+            self.versions = dict(self.snapshot.versions)
+            logging.info(f"Opened shared persona snapshot with {len(self.snapshot)} personas: {self.snapshot_path}")
+            return
+        
+        self.versions = self.source_versions()
+        
+        # 最新のスナップショットがあればヘッダーのみ読み込んで終了
+        if self.snapshot_path and self.load_snapshot():
+            logging.info(f"Loaded persona snapshot with {len(self.snapshot)} personas: {self.snapshot_path}")
+            return
+        
+        # 作品DBからペルソナを構築するため、コピーライター別の取得に使う索引を用意
+        self.ensure_work_index()
+        
+        # スタイル分析結果の読み込み（シャード形式ではマニフェストのみ）
         try:
-            with open(self.analysis_data_path, 'r', encoding='utf-8') as f:
-                self.style_analysis = json.load(f)
+            self.analysis_artifact = StyleAnalysisArtifact(self.analysis_data_path)
         except FileNotFoundError:
-            self.style_analysis = {}
+            self.analysis_artifact = None
             logging.warning("Style analysis data not found, using fallback")
         
-        # TCCデータベースからの実作品読み込み
-        self.load_actual_works()
+        logging.info(f"Indexed {len(self.list_available_personas())} personas (built on first request)")
+    
+    def source_versions(self) -> Dict:
+        """ペルソナの生成元（作品DB・分析結果・構築ロジック）のバージョン"""
+        return {
+            'database': database_version(self.db),
+            'analysis': analysis_version(self.analysis_data_path),
+            'persona_build': PERSONA_BUILD_VERSION
+        }
+    
+    @property
+    def version(self) -> str:
+        """読み込んだペルソナデータのバージョン（生成元バージョンの短縮ハッシュ）"""
+        payload = json.dumps(self.versions, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+    
+    def has_source_changes(self) -> bool:
+        """読み込み後にスナップショット・分析結果・作品DBが更新されたか"""
+        if self.snapshot_path and file_version(self.snapshot_path) != self.snapshot_version:
+            return True
+        if self.snapshot is not None and not self.verify_snapshot:
+            return False
+        return self.source_versions() != self.versions
+    
+    def load_snapshot(self, verify: bool = True) -> bool:
+        """ペルソナスナップショットを開く（存在しない・古い場合はFalse）"""
+        try:
+            snapshot = PersonaSnapshot(self.snapshot_path)
+        except FileNotFoundError:
+            logging.info(f"Persona snapshot not found: {self.snapshot_path}")
+            return False
+        except ValueError as e:
+            logging.warning(f"Ignoring persona snapshot: {e}")
+            return False
+        
+        stale = snapshot.stale_keys(self.versions) if verify else []
+        if stale:
+            logging.warning(f"Persona snapshot is stale ({', '.join(stale)} changed), building from sources")
+            snapshot.close()
+            return False
+        
+        self.snapshot = snapshot
+        return True
+    
+    def write_snapshot(self, path: str) -> Dict:
+        """全ペルソナを構築してスナップショットに書き出す"""
+        if self.snapshot is not None:
+            raise ValueError("Persona snapshots must be built from the source DB and analysis data")
         
-        # 統合ペルソナプロファイルの構築
-        self.build_integrated_personas()
+        personas = ((name, self.build_persona(name)) for name in self.list_available_personas())
+        return write_persona_snapshot(path, personas, self.source_versions())
     
-    def load_actual_works(self):
-        """実際の作品データ読み込み"""
+    def ensure_work_index(self) -> bool:
+        """copy_works.copywriter の索引を確認し、無ければ作成する
+        
+        スクレイパー以外で作成されたDBでは索引が無く、ペルソナごとの作品取得が全件走査になる。
+        作成できない場合（読み取り専用のDBなど）は警告のみ
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT copywriter, copy_text, client, industry, media_type, year, award
-                FROM copy_works
-                WHERE copy_text IS NOT NULL AND copy_text != ""
-            ''')
+            with self.db.reader() as conn:
+                if conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'copy_works'"
+                ).fetchone() is None:
+                    return False
+                for index in conn.execute("PRAGMA index_list(copy_works)").fetchall():
+                    columns = [row[2] for row in conn.execute(f"PRAGMA index_info('{index[1]}')")]
+                    if columns[:1] == ['copywriter']:
+                        return True
             
-            self.actual_works = {}
-            for row in cursor.fetchall():
-                copywriter = row[0]
-                if copywriter not in self.actual_works:
-                    self.actual_works[copywriter] = []
+            with self.db.writer() as conn:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {WORK_INDEX_NAME} ON copy_works (copywriter)")
+            logging.info(f"Created {WORK_INDEX_NAME} on {self.db_path}")
+            return True
+        except sqlite3.Error as e:
+            logging.warning(f"copy_works has no copywriter index and it could not be created "
+                            f"({e}); work samples will be read with full table scans")
+            return False
+    
+    def load_work_samples(self, name: str, limit: int = MAX_WORK_SAMPLES) -> List[Dict]:
+        """コピーライターの実作品サンプル読み込み（作品登録順に最大limit件）
+        
+        copywriter列の索引を使い、必要な行だけをSQL側で絞り込む
+        """
+        try:
+            with self.db.reader() as conn:
+                cursor = conn.execute('''
+                    SELECT copy_text, client, industry, media_type, year, award
+                    FROM copy_works
+                    WHERE copywriter = ? AND copy_text IS NOT NULL AND copy_text != ""
+                    ORDER BY rowid
+                    LIMIT ?
+                ''', (name, limit))
                 
-                self.actual_works[copywriter].append({
-                    'copy_text': row[1],
-                    'client': row[2],
-                    'industry': row[3],
-                    'media_type': row[4],
-                    'year': row[5],
-                    'award': row[6]
-                })
-            
-            conn.close()
-            logging.info(f"Loaded actual works for {len(self.actual_works)} copywriters")
+                return [
+                    {
+                        'copy_text': row[0],
+                        'client': row[1],
+                        'industry': row[2],
+                        'media_type': row[3],
+                        'year': row[4],
+                        'award': row[5]
+                    }
+                    for row in cursor
+                ]
             
         except Exception as e:
-            logging.error(f"Error loading actual works: {e}")
-            self.actual_works = {}
+            logging.error(f"Error loading work samples for {name}: {e}")
+            return []
     
-    def build_integrated_personas(self):
+    def build_persona(self, name: str) -> Optional[Dict]:
         """統合ペルソナプロファイル構築"""
-        self.integrated_personas = {}
+        if self.snapshot is not None:
+            return self.snapshot.load(name)
+        
+        if self.analysis_artifact is None:
+            return None
         
         # スタイル分析データとの統合
-        if 'copywriter_analyses' in self.style_analysis:
-            for name, analysis in self.style_analysis['copywriter_analyses'].items():
-                
-                # 実作品サンプル
-                work_samples = self.actual_works.get(name, [])[:5]  # 最大5作品
-                
-                # 統合ペルソナプロファイル作成
-                integrated_persona = {
-                    'name': name,
-                    'style_metrics': analysis,
-                    'work_samples': work_samples,
-                    'writing_patterns': self.extract_writing_patterns(name, work_samples),
-                    'signature_elements': self.identify_signature_elements(analysis),
-                    'generation_prompts': self.create_generation_prompts(name, analysis, work_samples)
-                }
-                
-                self.integrated_personas[name] = integrated_persona
+        analysis = self.analysis_artifact.load_metrics(name)
+        if analysis is None:
+            return None
         
-        logging.info(f"Built integrated personas for {len(self.integrated_personas)} copywriters")
+        # TCCデータベースからの実作品サンプル
+        work_samples = self.load_work_samples(name)
+        
+        # 統合ペルソナプロファイル作成
+        return {
+            'name': name,
+            'style_metrics': analysis,
+            'work_samples': work_samples,
+            'writing_patterns': self.extract_writing_patterns(name, work_samples),
+            'signature_elements': self.identify_signature_elements(analysis),
+            'generation_prompts': self.create_generation_prompts(name, analysis, work_samples)
+        }
     
     def extract_writing_patterns(self, name: str, works: List[Dict]) -> Dict:
         """ライティングパターン抽出"""
@@ -168,7 +350,9 @@ class PersonaDatabase:
             'sentence_patterns': []
         }
         
-        for work in works:
+        tokenized_works = self.tokenizer.tokenize_many(work['copy_text'] for work in works)
+        
+        for work, tokens in zip(works, tokenized_works):
             text = work['copy_text']
             
             # 文の構造分析
@@ -180,7 +364,7 @@ class PersonaDatabase:
                     patterns['characteristic_endings'].append(sentences[-1][-10:])
             
             # 特徴的表現の抽出
-            expressions = re.findall(r'[ぁ-んァ-ヶー一-龠]{2,6}', text)
+            expressions = tokens.expressions()
             patterns['preferred_expressions'].extend(expressions)
         
         # 頻度分析
@@ -230,11 +414,7 @@ class PersonaDatabase:
         """.strip()
         
         # 実作品例
-        work_examples = ""
-        if works:
-            work_examples = "実際の作品例:\n"
-            for i, work in enumerate(works[:3], 1):
-                work_examples += f"{i}. 「{work['copy_text']}」（{work.get('client', '不明')}・{work.get('year', '不明')}年）\n"
+        work_examples = format_work_examples(works[:PROMPT_EXAMPLE_COUNT])
         
         # 生成指示プロンプト
         generation_prompt = f"""
@@ -261,41 +441,246 @@ class PersonaDatabase:
         }
     
     def get_persona(self, name: str) -> Optional[Dict]:
-        """ペルソナ取得"""
-        return self.integrated_personas.get(name)
+        """ペルソナ取得（未構築なら構築してLRUに追加）"""
+        with self._persona_lock:
+            persona = self._personas.get(name)
+            if persona is not None:
+                self._personas.move_to_end(name)
+                self.hits += 1
+                return persona
+        
+        if not self.has_persona(name):
+            return None
+        
+        # 構築はロックの外で行う（同時に同じペルソナを要求された場合は後勝ち）
+        persona = self.build_persona(name)
+        if persona is None:
+            return None
+        
+        with self._persona_lock:
+            self.misses += 1
+            self._personas[name] = persona
+            self._personas.move_to_end(name)
+            while len(self._personas) > self.max_personas:
+                self._personas.popitem(last=False)
+                self.evictions += 1
+        
+        return persona
+    
+    def get_example_index(self, name: str) -> Optional[ExampleIndex]:
+        """作品例検索インデックス取得（未構築なら作品DBから構築してLRUに追加）"""
+        with self._persona_lock:
+            if name in self._example_indexes:
+                self._example_indexes.move_to_end(name)
+                return self._example_indexes[name]
+        
+        works = self.load_work_samples(name, MAX_INDEXED_WORKS)
+        example_index = ExampleIndex.build(works) if works else None
+        
+        with self._persona_lock:
+            self._example_indexes[name] = example_index
+            self._example_indexes.move_to_end(name)
+            while len(self._example_indexes) > self.max_personas:
+                self._example_indexes.popitem(last=False)
+        
+        return example_index
+    
+    def cached_persona_names(self) -> List[str]:
+        """構築済みペルソナ名（古い順）"""
+        with self._persona_lock:
+            return list(self._personas)
+    
+    def warm(self, names: List[str]) -> int:
+        """指定ペルソナを事前に構築（構築できた件数を返す）"""
+        return sum(1 for name in names if self.get_persona(name) is not None)
+    
+    def has_persona(self, name: str) -> bool:
+        """ペルソナが利用可能か（索引のみ参照）"""
+        source = self.snapshot if self.snapshot is not None else self.analysis_artifact
+        return source is not None and name in source
     
     def list_available_personas(self) -> List[str]:
-        """利用可能ペルソナ一覧"""
-        return list(self.integrated_personas.keys())
+        """利用可能ペルソナ一覧（索引のみ参照し、ペルソナは構築しない）"""
+        if self.snapshot is not None:
+            return self.snapshot.writers()
+        if self.analysis_artifact is None:
+            return []
+        return self.analysis_artifact.writers()
+    
+    def validation_error(self) -> Optional[str]:
+        """読み込んだペルソナデータが使えない理由（使える場合はNone）"""
+        if self.snapshot is None and self.analysis_artifact is None:
+            return "neither a persona snapshot nor style analysis data could be loaded"
+        if not self.list_available_personas():
+            return "no personas available"
+        return None
+    
+    def get_cache_statistics(self) -> Dict:
+        """構築済みペルソナLRUのヒット率"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._personas),
+            'example_indexes': len(self._example_indexes),
+            'max_entries': self.max_personas,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total > 0 else 0.0
+        }
+
+# 品質評価用の語彙リスト
+SCORING_LEXICONS = {
+    'emotional': [
+        '感動', '驚き', '喜び', '愛', '幸せ', '素晴らしい', '美しい', '特別',
+        '感謝', '心', '思い', '願い', '夢', '希望', '感じる', '体験'
+    ],
+    'cta': ['今すぐ', 'お試し', '体験', '発見', 'はじめ', '選ぶ'],
+    'feeling': ['感じ', '心', '思い'],
+    'youth': ['新しい', 'トレンド', 'スタイリッシュ', '今', '最新'],
+    'mature': ['信頼', '品質', '安心', '実績', '経験'],
+    'female': ['美しい', '優しい', 'エレガント', 'かわいい', 'おしゃれ'],
+    'male': ['力強い', 'クール', 'スマート', 'プロ', '本格']
+}
 
 class AdvancedCopywriterAIGenerator:
     """高精度コピーライター AI生成器"""
     
-    def __init__(self, persona_db: PersonaDatabase, api_key: str = None):
+    def __init__(self, persona_db: PersonaDatabase, api_key: str = None, base_url: Optional[str] = None,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 generation_cache: Optional[GenerationCache] = None):
         self.persona_db = persona_db
         self.api_key = api_key
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        
+        # 同一依頼の生成結果キャッシュ（Noneの場合は毎回生成）
+        self.generation_cache = generation_cache
+        
+        # 品質評価用語彙の照合器（生成コピーを1回走査するだけで全リストを照合）
+        self.lexicon_matcher = LexiconMatcher(SCORING_LEXICONS)
+        
+        # API呼び出しの統計
+        self.api_calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        
+        # 非同期クライアントと同時実行数のセマフォは実行中のイベントループごとに用意する
+        self._loop = None
+        self._semaphore = None
         
         # Claude API初期化
         if ANTHROPIC_AVAILABLE and api_key and api_key != "your-api-key-here":
-            self.client = anthropic.Anthropic(api_key=api_key)
+            self.client = self._create_client()
         else:
             self.client = None
             logging.warning("Claude API not available, using fallback generation")
     
-    async def generate_advanced_copy(self, request: AdvancedCopywritingRequest) -> AdvancedCopywritingResult:
-        """高精度コピー生成"""
+    def _create_client(self):
+        """接続プールの上限を明示した非同期Claudeクライアントを作成"""
+        # SDKが使うHTTPクライアントのLimits型（SDKのバージョンによりhttpxの実装が異なるため既定値から取得）
+        limits_type = type(anthropic.DEFAULT_CONNECTION_LIMITS)
+        http_client = anthropic.DefaultAsyncHttpxClient(
+            limits=limits_type(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            )
+        )
+        return anthropic.AsyncAnthropic(api_key=self.api_key, base_url=self.base_url, http_client=http_client)
+    
+    async def _api_resources(self):
+        """実行中のイベントループ用のクライアントとセマフォ（ループが変わった場合は作り直す）"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 接続は作成時のイベントループに結び付くため、別ループでは新しいクライアントを使う
+            previous_client, previous_loop = self.client, self._loop
+            if previous_loop is not None:
+                self.client = self._create_client()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+            
+            # 差し替え後に旧クライアントの接続プールを閉じる（待機中に来たリクエストは新クライアントを使う）
+            if previous_loop is not None:
+                await self._close_client(previous_client, previous_loop)
+        return self.client, self._semaphore
+    
+    async def _close_client(self, client, loop):
+        """クライアントの接続プールを閉じる（接続は作成時のイベントループ上で閉じる必要がある）"""
+        try:
+            if loop is not None and loop is not asyncio.get_running_loop() and loop.is_running():
+                # 別スレッドで実行中のループの接続はそのループ上で閉じる
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.close(), loop))
+            else:
+                await client.close()
+        except Exception as e:
+            # 終了済みのループの接続は閉じられない（ループの終了前に aclose() を呼ぶこと）
+            logging.warning(f"Could not close previous Claude client connections: {e}")
+    
+    async def aclose(self):
+        """Claudeクライアントの接続プールを閉じる
         
-        # ペルソナ情報取得
-        persona = self.persona_db.get_persona(request.copywriter_persona)
+        イベントループの終了前（asyncio.run に渡す処理の最後）に呼ぶ。以降の生成では新しいクライアントを使う
+        """
+        if self.client is None:
+            return
+        client, loop = self.client, self._loop
+        self.client = self._create_client()
+        self._loop = None
+        self._semaphore = None
+        await self._close_client(client, loop)
+    
+    def get_api_statistics(self) -> Dict:
+        """API呼び出しの同時実行状況"""
+        return {
+            'calls': self.api_calls,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'max_concurrency': self.max_concurrency,
+            'max_connections': self.max_connections
+        }
+    
+    def generation_version(self, persona_db: Optional[PersonaDatabase] = None) -> str:
+        """生成結果に影響するバージョン（ペルソナデータ・プロンプト・生成方式）"""
+        persona_db = persona_db or self.persona_db
+        method = CLAUDE_MODEL if self.client else 'fallback'
+        return f"{persona_db.version}:{PROMPT_VERSION}:{method}"
+    
+    async def generate_advanced_copy(self, request: AdvancedCopywritingRequest,
+                                     fresh: bool = False) -> AdvancedCopywritingResult:
+        """高精度コピー生成
+        
+        生成結果キャッシュがある場合、同じ依頼・同じペルソナデータの結果を再利用する。
+        fresh=True の場合はキャッシュを参照せずに生成し、結果でキャッシュを更新する
+        """
+        
+        # ペルソナ情報取得（リロードで差し替わっても、取得したペルソナとバージョンを揃える）
+        persona_db = self.persona_db
+        persona = persona_db.get_persona(request.copywriter_persona)
         if not persona:
             raise ValueError(f"Persona not found: {request.copywriter_persona}")
         
+        cache = self.generation_cache
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(request, self.generation_version(persona_db))
+            if fresh:
+                cache.record_bypass()
+            else:
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    result = AdvancedCopywritingResult(**cached)
+                    result.generation_metadata = dict(result.generation_metadata, cached=True)
+                    return result
+        
+        start_time = time.perf_counter()
+        
         # 生成プロンプト構築
-        generation_prompt = self.build_advanced_prompt(request, persona)
+        generation_prompt = self.build_advanced_prompt(request, persona, persona_db)
         
         # AI生成実行
         if self.client:
-            generated_content = await self.generate_with_claude(generation_prompt, request)
+            generated_content = await self.generate_with_claude(generation_prompt, request, persona)
         else:
             generated_content = self.generate_fallback(request, persona)
         
@@ -303,7 +688,7 @@ class AdvancedCopywriterAIGenerator:
         quality_scores = self.analyze_quality(generated_content, request, persona)
         
         # 結果構築
-        return AdvancedCopywritingResult(
+        result = AdvancedCopywritingResult(
             primary_copy=generated_content['primary'],
             alternative_versions=generated_content.get('alternatives', []),
             style_accuracy_score=quality_scores['style_accuracy'],
@@ -317,12 +702,27 @@ class AdvancedCopywriterAIGenerator:
             confidence_score=quality_scores['confidence'],
             recommended_usage=self.generate_usage_recommendations(quality_scores)
         )
+        
+        # API失敗時のフォールバック結果は保存しない（次回はAPIで生成し直す）
+        api_failed = self.client and result.generation_metadata.get('generation_method') == 'fallback'
+        if cache_key is not None and not api_failed:
+            cache.put(cache_key, asdict(result), time.perf_counter() - start_time)
+        
+        return result
     
-    def build_advanced_prompt(self, request: AdvancedCopywritingRequest, persona: Dict) -> str:
+    def build_advanced_prompt(self, request: AdvancedCopywritingRequest, persona: Dict,
+                              persona_db: Optional[PersonaDatabase] = None) -> str:
         """高度なプロンプト構築"""
         
         base_prompt = persona['generation_prompts']['generation_prompt']
         
+        # 依頼内容に近い作品例へ差し替え（例の数は変えない）
+        default_examples = persona['generation_prompts']['work_examples']
+        if default_examples:
+            examples = self.select_work_examples(request, persona, persona_db=persona_db)
+            if examples:
+                base_prompt = base_prompt.replace(default_examples, format_work_examples(examples), 1)
+        
         # 追加コンテキスト
         context_additions = f"""
 
@@ -362,18 +762,36 @@ class AdvancedCopywriterAIGenerator:
         
         return base_prompt + context_additions + quality_requirements
     
-    async def generate_with_claude(self, prompt: str, request: AdvancedCopywritingRequest) -> Dict:
+    def select_work_examples(self, request: AdvancedCopywritingRequest, persona: Dict,
+                             k: int = PROMPT_EXAMPLE_COUNT,
+                             persona_db: Optional[PersonaDatabase] = None) -> List[Dict]:
+        """依頼の商品・ターゲット・キーメッセージに近い作品例を選択"""
+        example_index = (persona_db or self.persona_db).get_example_index(persona['name'])
+        if example_index is None:
+            return []
+        query = build_query(request.product_service, request.target_audience, *request.key_messages)
+        return example_index.search(query, k)
+    
+    async def generate_with_claude(self, prompt: str, request: AdvancedCopywritingRequest,
+                                   persona: Optional[Dict] = None) -> Dict:
         """Claude APIでの生成"""
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=2000,
-                    temperature=min(0.9, 0.3 + request.creativity_level * 0.6),
-                    messages=[{"role": "user", "content": prompt}]
-                )
-            )
+            client, semaphore = await self._api_resources()
+            
+            # スレッドを使わずイベントループ上で待機し、同時実行数はセマフォで制限
+            async with semaphore:
+                self.api_calls += 1
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                try:
+                    response = await client.messages.create(
+                        model=CLAUDE_MODEL,
+                        max_tokens=2000,
+                        temperature=min(0.9, 0.3 + request.creativity_level * 0.6),
+                        messages=[{"role": "user", "content": prompt}]
+                    )
+                finally:
+                    self.in_flight -= 1
             
             content = response.content[0].text
             
@@ -412,7 +830,9 @@ class AdvancedCopywriterAIGenerator:
             
         except Exception as e:
             logging.error(f"Claude API generation failed: {e}")
-            return self.generate_fallback(request, self.persona_db.get_persona(request.copywriter_persona))
+            if persona is None:
+                persona = self.persona_db.get_persona(request.copywriter_persona)
+            return self.generate_fallback(request, persona)
     
     def generate_fallback(self, request: AdvancedCopywritingRequest, persona: Dict) -> Dict:
         """フォールバック生成（APIなし）"""
@@ -530,8 +950,7 @@ class AdvancedCopywriterAIGenerator:
             score += 10
         
         # コール・トゥ・アクション
-        cta_words = ['今すぐ', 'お試し', '体験', '発見', 'はじめ', '選ぶ']
-        if any(word in copy_text for word in cta_words):
+        if self.lexicon_matcher.count(copy_text)['cta']:
             score += 10
         
         return min(100, score)
@@ -554,12 +973,7 @@ class AdvancedCopywriterAIGenerator:
     
     def calculate_emotional_impact(self, copy_text: str) -> float:
         """感情的インパクト計算"""
-        emotional_words = [
-            '感動', '驚き', '喜び', '愛', '幸せ', '素晴らしい', '美しい', '特別',
-            '感謝', '心', '思い', '願い', '夢', '希望', '感じる', '体験'
-        ]
-        
-        impact_count = sum(1 for word in emotional_words if word in copy_text)
+        impact_count = self.lexicon_matcher.count(copy_text)['emotional']
         return min(100, impact_count * 20)
     
     def detect_style_elements(self, copy_text: str, persona: Dict) -> List[str]:
@@ -568,10 +982,11 @@ class AdvancedCopywriterAIGenerator:
         
         # シグネチャー要素チェック
         signature_elements = persona.get('signature_elements', [])
+        lexicon_counts = self.lexicon_matcher.count(copy_text)
         for element in signature_elements:
             if '語彙' in element and len(set(copy_text.split())) > 5:
                 elements.append('語彙多様性')
-            elif '感情' in element and any(word in copy_text for word in ['感じ', '心', '思い']):
+            elif '感情' in element and lexicon_counts['feeling']:
                 elements.append('感情的表現')
             elif '読みやすさ' in element and len(copy_text) < 100:
                 elements.append('簡潔な表現')
@@ -598,22 +1013,19 @@ class AdvancedCopywriterAIGenerator:
     def analyze_target_alignment(self, copy_text: str, request: AdvancedCopywritingRequest) -> Dict[str, float]:
         """ターゲット適合度分析"""
         alignment = {}
+        lexicon_counts = self.lexicon_matcher.count(copy_text)
         
         # 年代適合度（簡易判定）
         if '若い' in request.target_audience or '20代' in request.target_audience:
-            youth_words = ['新しい', 'トレンド', 'スタイリッシュ', '今', '最新']
-            alignment['age_appropriateness'] = sum(10 for word in youth_words if word in copy_text)
+            alignment['age_appropriateness'] = lexicon_counts['youth'] * 10
         else:
-            mature_words = ['信頼', '品質', '安心', '実績', '経験']
-            alignment['age_appropriateness'] = sum(10 for word in mature_words if word in copy_text)
+            alignment['age_appropriateness'] = lexicon_counts['mature'] * 10
         
         # 性別適合度
         if '女性' in request.target_audience:
-            female_words = ['美しい', '優しい', 'エレガント', 'かわいい', 'おしゃれ']
-            alignment['gender_appropriateness'] = sum(10 for word in female_words if word in copy_text)
+            alignment['gender_appropriateness'] = lexicon_counts['female'] * 10
         elif '男性' in request.target_audience:
-            male_words = ['力強い', 'クール', 'スマート', 'プロ', '本格']
-            alignment['gender_appropriateness'] = sum(10 for word in male_words if word in copy_text)
+            alignment['gender_appropriateness'] = lexicon_counts['male'] * 10
         else:
             alignment['gender_appropriateness'] = 50.0
         
@@ -640,25 +1052,191 @@ class AdvancedCopywriterAIGenerator:
         
         return recommendations
 
+# 一括生成の同時実行数の既定値
+DEFAULT_BATCH_CONCURRENCY = 8
+
+# ペルソナデータの更新確認間隔（秒）
+DEFAULT_RELOAD_INTERVAL = 30.0
+
+class PersonaReloader:
+    """ペルソナデータのホットリロード
+    
+    バックグラウンドスレッドでスナップショット・分析結果・作品DBの更新を監視し、
+    新しいPersonaDatabaseをリクエスト処理の外で構築してから差し替える
+    """
+    
+    def __init__(self, system: 'ProductionCopywriterAI', interval: float = DEFAULT_RELOAD_INTERVAL):
+        self.system = system
+        self.interval = interval
+        
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._reload_lock = threading.Lock()
+        
+        # リロード統計
+        self.reload_count = 0
+        self.last_reload_at = None
+        self.last_reload_latency = None
+        self.last_error = None
+    
+    def start(self):
+        """監視スレッド開始"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='persona-reloader', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = None):
+        """監視スレッド停止"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.last_error = str(e)
+                logging.error(f"Persona reload check failed: {e}")
+    
+    def check(self) -> bool:
+        """生成元が更新されていればリロード"""
+        if not self.system.persona_db.has_source_changes():
+            return False
+        return self.reload()
+    
+    def reload(self) -> bool:
+        """新しいPersonaDatabaseを構築・事前構築してから差し替え
+        
+        デプロイ中に生成元が削除・置き換え途中の場合など、新しいデータが使えなければ現在のデータを使い続ける
+        """
+        with self._reload_lock:
+            old_db = self.system.persona_db
+            start = time.perf_counter()
+            try:
+                new_db = self.system.create_persona_db()
+                error = new_db.validation_error()
+                if error is None:
+                    # 旧データで構築済みだったペルソナは差し替え前に構築しておく
+                    cached_names = old_db.cached_persona_names()
+                    if cached_names and new_db.warm(cached_names) == 0:
+                        error = "none of the cached personas could be built"
+            except Exception as e:
+                error = str(e)
+            
+            if error is not None:
+                self.last_error = error
+                logging.error(f"Persona reload failed, keeping version {old_db.version}: {error}")
+                return False
+            
+            self.system.swap_persona_db(new_db)
+            
+            self.reload_count += 1
+            self.last_reload_at = datetime.now().isoformat()
+            self.last_reload_latency = time.perf_counter() - start
+            self.last_error = None
+            logging.info(f"Personas reloaded: {old_db.version} -> {new_db.version} "
+                         f"({self.last_reload_latency * 1000:.1f} ms)")
+            return True
+    
+    def get_status(self) -> Dict:
+        """リロード状況"""
+        return {
+            'watching': self._thread is not None and self._thread.is_alive(),
+            'interval': self.interval,
+            'reload_count': self.reload_count,
+            'last_reload_at': self.last_reload_at,
+            'last_reload_latency': self.last_reload_latency,
+            'last_error': self.last_error
+        }
+
 # 統合システムクラス
 class ProductionCopywriterAI:
-    """本格運用コピーライターAIシステム"""
+    """本格運用コピーライターAIシステム
+    
+    reload_interval を指定すると、ペルソナデータの更新をバックグラウンドで監視してホットリロードする
+    """
     
-    def __init__(self, db_path: str, analysis_path: str, api_key: str = None):
-        self.persona_db = PersonaDatabase(db_path, analysis_path)
-        self.generator = AdvancedCopywriterAIGenerator(self.persona_db, api_key)
+    def __init__(self, db_path: str, analysis_path: str, api_key: str = None,
+                 snapshot_path: Optional[str] = None, reload_interval: Optional[float] = None,
+                 verify_snapshot: bool = True, **generator_options):
+        self.db_path = db_path
+        self.analysis_path = analysis_path
+        self.snapshot_path = snapshot_path
+        self.verify_snapshot = verify_snapshot
+        
+        # generator_options: base_url, max_connections, max_concurrency, generation_cache
+        self.generator = AdvancedCopywriterAIGenerator(self.create_persona_db(), api_key, **generator_options)
+        
+        self.reloader = PersonaReloader(self, reload_interval or DEFAULT_RELOAD_INTERVAL)
+        if reload_interval:
+            self.reloader.start()
         
         logging.info("Production Copywriter AI System initialized")
     
+    @property
+    def persona_db(self) -> PersonaDatabase:
+        return self.generator.persona_db
+    
+    def create_persona_db(self) -> PersonaDatabase:
+        """現在の生成元からPersonaDatabaseを作成"""
+        return PersonaDatabase(self.db_path, self.analysis_path, snapshot_path=self.snapshot_path,
+                               verify_snapshot=self.verify_snapshot)
+    
+    def swap_persona_db(self, persona_db: PersonaDatabase):
+        """PersonaDatabaseの差し替え
+        
+        参照1つの代入なのでアトミックに切り替わり、実行中のリクエストは取得済みの旧ペルソナで完了する
+        """
+        self.generator.persona_db = persona_db
+    
+    def reload_personas(self) -> bool:
+        """ペルソナデータを即時リロード"""
+        return self.reloader.reload()
+    
+    def get_persona_status(self) -> Dict:
+        """使用中のペルソナデータのバージョンとリロード状況"""
+        persona_db = self.persona_db
+        return {
+            'version': persona_db.version,
+            'source_versions': persona_db.versions,
+            'source': 'snapshot' if persona_db.snapshot is not None else 'analysis',
+            'loaded_at': persona_db.loaded_at,
+            'reload': self.reloader.get_status()
+        }
+    
+    def close(self):
+        """バックグラウンド監視の停止"""
+        self.reloader.stop()
+    
+    async def aclose(self):
+        """バックグラウンド監視の停止とClaudeクライアントの接続プールの解放（イベントループの終了前に呼ぶ）"""
+        self.close()
+        await self.generator.aclose()
+    
     async def create_professional_copy(self, 
                                      copywriter_name: str,
                                      product_service: str,
                                      target_audience: str,
                                      content_type: str = "advertisement",
+                                     fresh: bool = False,
                                      **kwargs) -> AdvancedCopywritingResult:
-        """プロフェッショナルコピー作成"""
+        """プロフェッショナルコピー作成（fresh=True で生成結果キャッシュを使わない）"""
         
-        request = AdvancedCopywritingRequest(
+        request = self.build_request(copywriter_name, product_service, target_audience, content_type, **kwargs)
+        return await self.generator.generate_advanced_copy(request, fresh=fresh)
+    
+    def build_request(self,
+                      copywriter_name: str,
+                      product_service: str,
+                      target_audience: str,
+                      content_type: str = "advertisement",
+                      **kwargs) -> AdvancedCopywritingRequest:
+        """依頼の作成（省略した項目は既定値）"""
+        return AdvancedCopywritingRequest(
             copywriter_persona=copywriter_name,
             content_type=content_type,
             product_service=product_service,
@@ -674,8 +1252,47 @@ class ProductionCopywriterAI:
             competitive_context=kwargs.get('competitive_context'),
             cultural_considerations=kwargs.get('cultural_considerations')
         )
-        
-        return await self.generator.generate_advanced_copy(request)
+    
+    async def _generate_batch_item(self, index: int, request: AdvancedCopywritingRequest,
+                                   semaphore: asyncio.Semaphore, fresh: bool = False) -> BatchGenerationItem:
+        """一括生成の1件を実行（例外は結果に格納して一括処理全体は止めない）"""
+        async with semaphore:
+            start_time = time.perf_counter()
+            try:
+                result = await self.generator.generate_advanced_copy(request, fresh=fresh)
+                return BatchGenerationItem(index, request, result=result,
+                                           elapsed=time.perf_counter() - start_time)
+            except Exception as e:
+                logging.warning(f"Batch item {index} ({request.copywriter_persona}) failed: {e}")
+                return BatchGenerationItem(index, request, error=str(e), error_type=type(e).__name__,
+                                           elapsed=time.perf_counter() - start_time)
+    
+    async def iter_generate(self, requests: Sequence[AdvancedCopywritingRequest],
+                            concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+                            fresh: bool = False) -> AsyncIterator[BatchGenerationItem]:
+        """複数の依頼を並行生成し、完了した順に結果を返す（item.indexが入力順の位置）"""
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = [
+            asyncio.ensure_future(self._generate_batch_item(index, request, semaphore, fresh))
+            for index, request in enumerate(requests)
+        ]
+        try:
+            for next_item in asyncio.as_completed(tasks):
+                yield await next_item
+        finally:
+            # 呼び出し側が途中で反復をやめた場合は残りの生成を取り消す
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    async def generate_many(self, requests: Sequence[AdvancedCopywritingRequest],
+                            concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+                            fresh: bool = False) -> List[BatchGenerationItem]:
+        """複数の依頼を並行生成し、入力と同じ順序で結果を返す"""
+        items: List[Optional[BatchGenerationItem]] = [None] * len(requests)
+        async for item in self.iter_generate(requests, concurrency, fresh):
+            items[item.index] = item
+        return items
     
     def get_available_copywriters(self) -> List[str]:
         """利用可能コピーライター取得"""
@@ -684,6 +1301,15 @@ class ProductionCopywriterAI:
     def get_copywriter_profile(self, name: str) -> Optional[Dict]:
         """コピーライタープロファイル取得"""
         return self.persona_db.get_persona(name)
+    
+    def get_persona_cache_statistics(self) -> Dict:
+        """ペルソナキャッシュの統計取得"""
+        return self.persona_db.get_cache_statistics()
+    
+    def get_generation_cache_statistics(self) -> Optional[Dict]:
+        """生成結果キャッシュの統計取得（キャッシュを使っていない場合はNone）"""
+        cache = self.generator.generation_cache
+        return cache.get_statistics() if cache is not None else None
 
 # デモ・テスト実行
 async def run_production_demo():
@@ -693,7 +1319,9 @@ async def run_production_demo():
     # システム初期化
     system = ProductionCopywriterAI(
         db_path='/Users/naoki/tcc_copyworks.db',
-        analysis_path='/Users/naoki/copywriter_style_analysis_20250810_000147.json'
+        analysis_path='/Users/naoki/copywriter_style_analysis_20250810_000147.json',
+        snapshot_path='/Users/naoki/copywriter_personas.snapshot',
+        generation_cache=GenerationCache('/Users/naoki/copywriter_generation_cache.db')
     )
     
     print("📋 Available Copywriters:")
@@ -703,6 +1331,7 @@ async def run_production_demo():
     
     if not available:
         print("  No copywriters available in database")
+        await system.aclose()
         return
     
     # テストケース実行
@@ -749,9 +1378,103 @@ async def run_production_demo():
     for rec in result.recommended_usage:
         print(f"  • {rec}")
     
+    cache_stats = system.get_generation_cache_statistics()
+    print(f"\n🗄️ Generation Cache: {'hit' if result.generation_metadata.get('cached') else 'miss'} "
+          f"(hit rate {cache_stats['hit_rate']:.0%}, saved {cache_stats['saved_latency']:.2f}s)")
+    
     print(f"\n✅ Production demo completed!")
+    await system.aclose()
+    return result
+
+def build_persona_snapshot(db_path: str, analysis_path: str, snapshot_path: str) -> Dict:
+    """DB・分析結果からペルソナスナップショットを構築（デプロイ前のビルド手順）"""
+    persona_db = PersonaDatabase(db_path, analysis_path)
+    result = persona_db.write_snapshot(snapshot_path)
+    print(f"Persona snapshot written: {result['path']} ({result['personas']} personas, {result['bytes']} bytes)")
     return result
 
+# メモリ比較のワーカー方式
+MEMORY_BENCHMARK_MODES = ('per_process', 'shared_snapshot')
+
+def _persona_memory_worker(mode: str, db_path: str, analysis_path: str, snapshot_path: str,
+                           max_personas: int, barrier, results):
+    """全ペルソナを参照した後のメモリ増分を計測（spawnしたワーカープロセスで実行）"""
+    before = process_memory_usage()
+    
+    if mode == 'per_process':
+        # 従来方式: 全ペルソナをプロセス内の辞書に保持
+        persona_db = PersonaDatabase(db_path, analysis_path, max_personas=sys.maxsize)
+    else:
+        # 共有スナップショット: mmapしたファイルを全ワーカーで共有し、構築済みペルソナはLRUの上限まで
+        persona_db = PersonaDatabase(db_path, analysis_path, max_personas=max_personas,
+                                     snapshot_path=snapshot_path, verify_snapshot=False)
+    
+    personas = persona_db.warm(persona_db.list_available_personas())
+    gc.collect()
+    
+    # 全ワーカーが読み込みを終えた状態で計測（共有ページを正しく按分するため）
+    barrier.wait()
+    after = process_memory_usage()
+    results.put({
+        'personas': personas,
+        'cached_personas': len(persona_db.cached_persona_names()),
+        'increase_kb': {key: after[key] - before.get(key, 0) for key in after}
+    })
+    barrier.wait()
+
+def benchmark_persona_memory(db_path: str, analysis_path: str, snapshot_path: str, workers: int = 4,
+                             max_personas: int = DEFAULT_PERSONA_CACHE_SIZE) -> Dict:
+    """ワーカープロセスごとのメモリ増分を、従来のプロセス内辞書と共有スナップショットで比較
+    
+    Linuxでは rss・pss（共有ページをプロセス数で按分）・uss（専有）を、それ以外では最大RSSを比較する
+    """
+    build_persona_snapshot(db_path, analysis_path, snapshot_path)
+    
+    context = multiprocessing.get_context('spawn')
+    summary = {'workers': workers}
+    for mode in MEMORY_BENCHMARK_MODES:
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=_persona_memory_worker,
+                args=(mode, db_path, analysis_path, snapshot_path, max_personas, barrier, results)
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        worker_results = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        
+        metrics = [key for key in ('rss', 'pss', 'uss', 'max_rss') if key in worker_results[0]['increase_kb']]
+        summary[mode] = {
+            'personas': worker_results[0]['personas'],
+            'cached_personas': worker_results[0]['cached_personas'],
+            'per_worker_kb': {
+                key: sum(result['increase_kb'][key] for result in worker_results) / workers
+                for key in metrics
+            }
+        }
+        per_worker = ', '.join(f"{key} {value:.0f} KB" for key, value in summary[mode]['per_worker_kb'].items())
+        print(f"{mode}: {summary[mode]['personas']} personas, per worker: {per_worker}")
+    
+    return summary
+
 if __name__ == "__main__":
-    # 本格システムデモ実行
-    demo_result = asyncio.run(run_production_demo())
\ No newline at end of file
+    if '--benchmark-memory' in sys.argv:
+        benchmark_persona_memory(
+            '/Users/naoki/tcc_copyworks.db',
+            '/Users/naoki/copywriter_style_analysis_20250810_000147.json',
+            '/Users/naoki/copywriter_personas.snapshot'
+        )
+    elif '--build-snapshot' in sys.argv:
+        build_persona_snapshot(
+            '/Users/naoki/tcc_copyworks.db',
+            '/Users/naoki/copywriter_style_analysis_20250810_000147.json',
+            '/Users/naoki/copywriter_personas.snapshot'
+        )
+    else:
+        # 本格システムデモ実行
+        demo_result = asyncio.run(run_production_demo())
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Copy Analysis Cache
+個別コピー分析結果の永続キャッシュ
+
+analyze_single_copy の結果はコピーテキストのみで決まるため、
+テキストと分析器バージョンのハッシュをキーにSQLiteへ保存し、再分析を省略する
+"""
+
+import json
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable
+
+from copy_database import get_copy_database
+
+# SQLiteのバインド変数上限を超えないための一括取得サイズ
+LOOKUP_BATCH_SIZE = 500
+
+
+class CopyAnalysisCache:
+    """コンテンツアドレス型の分析結果キャッシュ"""
+    
+    def __init__(self, cache_path: str, version_tag: str):
+        self.cache_path = cache_path
+        self.version_tag = version_tag
+        self.db = get_copy_database(cache_path)
+        
+        self.hits = 0
+        self.misses = 0
+        
+        with self.db.writer() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS copy_analysis_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    analysis TEXT NOT NULL,
+                    created_at TEXT
+                )
+            ''')
+    
+    def make_key(self, text: str) -> str:
+        """コピーテキスト + 分析器バージョンのハッシュ"""
+        return hashlib.sha256(f"{self.version_tag}\0{text}".encode('utf-8')).hexdigest()
+    
+    def get_many(self, texts: Iterable[str]) -> Dict[str, Dict]:
+        """キャッシュ済みの分析結果をテキストごとに取得"""
+        keys = {self.make_key(text): text for text in texts}
+        key_list = list(keys)
+        found = {}
+        
+        with self.db.reader() as conn:
+            for i in range(0, len(key_list), LOOKUP_BATCH_SIZE):
+                batch = key_list[i:i + LOOKUP_BATCH_SIZE]
+                placeholders = ', '.join('?' * len(batch))
+                for cache_key, analysis in conn.execute(
+                    f"SELECT cache_key, analysis FROM copy_analysis_cache WHERE cache_key IN ({placeholders})",
+                    batch
+                ):
+                    found[keys[cache_key]] = json.loads(analysis)
+        
+        return found
+    
+    def put_many(self, analyses: Dict[str, Dict]):
+        """テキストごとの分析結果を保存"""
+        created_at = datetime.now().isoformat()
+        with self.db.writer() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO copy_analysis_cache (cache_key, analysis, created_at) VALUES (?, ?, ?)",
+                [
+                    (self.make_key(text), json.dumps(fields, ensure_ascii=False), created_at)
+                    for text, fields in analyses.items()
+                ]
+            )
+    
+    def record(self, hits: int, misses: int):
+        """ヒット・ミス数を加算"""
+        self.hits += hits
+        self.misses += misses
+    
+    def get_statistics(self) -> Dict:
+        """キャッシュヒット率"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total > 0 else 0.0
+        }
+    
+    def reset_statistics(self):
+        """ヒット・ミス数をリセット"""
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,154 @@
+"""
+Copy Database Access Layer
+コピー作品データベース 共通アクセス層
+
+TCCコピー作品DBへの接続をWALモード・PRAGMAチューニング済みで提供し、
+並行読み取り用の読み取り専用接続プールと、取り込み用の単一ライター接続を管理する
+"""
+
+import os
+import queue
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+# 接続共通のPRAGMA設定
+DEFAULT_PRAGMAS = {
+    'mmap_size': 256 * 1024 * 1024,  # 256MBをメモリマップ
+    'cache_size': -64 * 1024,        # 64MB（負値はKiB単位）
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,            # ミリ秒
+}
+
+# WALモードではNORMALでもコミット単位の耐久性が保たれる
+WRITER_SYNCHRONOUS = 'NORMAL'
+
+
+class CopyDatabase:
+    """WALモードのSQLiteデータベースへの共有アクセス層"""
+
+    def __init__(self, db_path: str, pool_size: int = 4, pragmas: Optional[Dict] = None):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.pragmas = dict(DEFAULT_PRAGMAS, **(pragmas or {}))
+
+        # 読み取り専用接続プール
+        self._readers = queue.LifoQueue(maxsize=pool_size)
+        self._readers_created = 0
+        self._pool_lock = threading.Lock()
+
+        # 単一ライター接続
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+        self._wal_checked = False
+
+    def _apply_pragmas(self, conn: sqlite3.Connection):
+        """接続にPRAGMAを適用"""
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+    def _ensure_wal(self):
+        """既存DBをWALモードへ切り替え（ジャーナルモードはDBファイルに永続化される）"""
+        if self._wal_checked:
+            return
+        self._wal_checked = True
+
+        if not os.path.exists(self.db_path):
+            return
+
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute("PRAGMA journal_mode = WAL")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            # 読み取り専用メディア上のDBなどでは既存モードのまま読む
+            logging.warning(f"Could not enable WAL for {self.db_path}: {e}")
+
+    def _open_writer(self) -> sqlite3.Connection:
+        """ライター接続を作成"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA synchronous = {WRITER_SYNCHRONOUS}")
+        self._apply_pragmas(conn)
+        self._wal_checked = True
+        return conn
+
+    def _open_reader(self) -> sqlite3.Connection:
+        """読み取り専用接続を作成"""
+        self._ensure_wal()
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._apply_pragmas(conn)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """ライター接続を排他取得（正常終了でコミット、例外でロールバック）"""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._open_writer()
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """プールから読み取り専用接続を借用"""
+        conn = None
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                if self._readers_created < self.pool_size:
+                    conn = self._open_reader()
+                    self._readers_created += 1
+            if conn is None:
+                # プール上限に達している場合は返却を待つ
+                conn = self._readers.get()
+
+        try:
+            yield conn
+        finally:
+            # 読み取りトランザクションを閉じてWALのチェックポイントを妨げない
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def close(self):
+        """全接続をクローズ"""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+        with self._pool_lock:
+            while True:
+                try:
+                    self._readers.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._readers_created = 0
+
+
+# プロセス内で共有するインスタンス（fork後の接続共有を避けるためPIDも鍵に含める）
+_databases: Dict[Tuple[int, str], CopyDatabase] = {}
+_databases_lock = threading.Lock()
+
+
+def get_copy_database(db_path: str, **kwargs) -> CopyDatabase:
+    """DBパスごとの共有CopyDatabaseを取得"""
+    key = (os.getpid(), os.path.abspath(db_path))
+    with _databases_lock:
+        if key not in _databases:
+            _databases[key] = CopyDatabase(db_path, **kwargs)
+        return _databases[key]
@@ -12,12 +12,13 @@ import asyncio
 from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
 from enum import Enum
-try:
-    import anthropic
-except ImportError:
-    anthropic = None
 from datetime import datetime
 
+from lazy_imports import lazy_import, module_available
+
+# Claude API（クライアント作成時まで読み込まない）
+anthropic = lazy_import('anthropic') if module_available('anthropic') else None
+
 # Configuration
 CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY", "your-api-key-here")
 
@@ -7,15 +7,26 @@ Advanced Copywriter Style Analysis System
 """
 
 import json
+import os
 import re
-import sqlite3
-import numpy as np
-import matplotlib.pyplot as plt
-from typing import Dict, List, Tuple, Optional
+import sys
+import time
+from typing import Callable, Dict, List, Tuple, Optional
 from dataclasses import dataclass, asdict
 from collections import Counter, defaultdict
-import unicodedata
+import hashlib
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from copy_database import get_copy_database
+from ngram_engine import NGramCounter, CorpusNGramStatistics
+from analysis_cache import CopyAnalysisCache
+from tokenizer_service import TokenizedText, get_tokenizer_service
+from style_features import CorpusFeatureMatrix, PUNCTUATION_MARKS
+from style_accumulator import FirstSeenCounter, StyleAggregator
+from sketches import DEFAULT_DELTA, DEFAULT_EPSILON, create_topk_sketch, measure_topk_accuracy
+from lexicon_matcher import LexiconMatcher
+from style_artifact import write_sharded_analysis
 
 # 日本語形態素解析用（MeCabが利用できない場合のダミー実装も含む）
 try:
@@ -32,6 +43,37 @@ if not MECAB_AVAILABLE:
         def Tagger(option):
             return None
 
+# 個別コピー分析ロジックのバージョン（変更時に上げると分析キャッシュが無効化される）
+ANALYZER_VERSION = 2
+
+# MeCab品詞 → 品詞分布のキー
+POS_CATEGORIES = {
+    '名詞': 'noun',
+    '動詞': 'verb',
+    '形容詞': 'adjective',
+    '助詞': 'particle'
+}
+
+# キャッシュ対象外のCopyAnalysisフィールド（作品ごとに入力から復元する）
+COPY_IDENTITY_FIELDS = ('entry_id', 'copy_text', 'copywriter')
+
+# 追加更新用の作品順序キーで年の後ろに置くrowidの桁（rowidはこれより小さいこと）
+WORK_ORDER_STRIDE = 1 << 40
+
+
+def _work_order_key(year: Optional[int], rowid: int) -> int:
+    """年 → rowid 順の作品順序キー（年が無い作品はSQLiteのORDER BYと同じく先頭）
+    
+    コピーライター内の並びが load_copyworks_data と一致するため、
+    後から追加した作品も全作品を読み直した場合と同じ位置に並ぶ
+    """
+    return ((year + 1) if year is not None else 0) * WORK_ORDER_STRIDE + rowid
+
+
+def _copywriter_sort_key(name: Optional[str]):
+    """SQLiteのORDER BY copywriterと同じ並び（NULLが先頭）"""
+    return (name is not None, name or '')
+
 @dataclass
 class StyleMetrics:
     """コピーライター スタイル指標"""
@@ -87,20 +129,43 @@ class CopyAnalysis:
     target_appeal: str  # 'logical', 'emotional', 'lifestyle'
     complexity: str  # 'simple', 'moderate', 'complex'
 
+@dataclass
+class KeywordIndex:
+    """コーパス全体のキーワード索引（独自性スコア計算用）"""
+    # キーワード → そのキーワードを使うコピーライター数
+    writer_counts: Dict[str, int]
+    # コピーライター → 作品から抽出された簡易キーワード集合
+    writer_keywords: Dict[str, set]
+
 class CopywriterStyleAnalyzer:
     """コピーライター スタイル分析器"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, common_phrase_ratio: Optional[float] = None,
+                 cache_path: Optional[str] = None, ranking_method: Optional[str] = None,
+                 ranking_epsilon: float = DEFAULT_EPSILON, ranking_delta: float = DEFAULT_DELTA,
+                 ranking_capacity: Optional[int] = None):
         self.db_path = db_path
-        self.mecab = None
+        self.cache_path = cache_path
+        
+        # コーパス全体・年代別の頻度ランキング（'exact' / 'space_saving' / 'count_min'、Noneで無効）
+        # 誤差上限は epsilon * 総出現数（count_minは確率 1-delta で保証）。
+        # ranking_capacity はSpaceSavingのカウンタ数（省略時は ceil(1/epsilon)）
+        self.ranking_method = ranking_method
+        self.ranking_epsilon = ranking_epsilon
+        self.ranking_delta = ranking_delta
+        self.ranking_capacity = ranking_capacity
+        self.db = get_copy_database(db_path)
+        
+        # 共有トークナイザー（テキスト単位でメモ化、cache_path指定時は永続化も行う）
+        self.tokenizer = get_tokenizer_service(cache_path)
+        
+        # シグネチャーフレーズ抽出用n-gramエンジン
+        # common_phrase_ratio指定時は、その割合以上のコピーライターが使うフレーズを除外
+        self.ngram_counter = NGramCounter()
+        self.common_phrase_ratio = common_phrase_ratio
         
-        # MeCab初期化
-        if MECAB_AVAILABLE:
-            try:
-                self.mecab = MeCab.Tagger('-Owakati')
-                print("MeCab initialized successfully")
-            except:
-                print("MeCab initialization failed, using fallback")
+        # MeCabタガーはプロセス内で共有
+        self.mecab = self.tokenizer.tagger
         
         # 感情語辞書（簡易版）
         self.emotional_words = {
@@ -118,36 +183,42 @@ class CopywriterStyleAnalyzer:
             'テクノロジー': ['革新', '技術', 'デジタル', 'AI', '未来', '効率', '便利']
         }
         
+        # 訴求タイプ指標
+        self.appeal_indicators = {
+            'logical': ['効果', '結果', '実証', '科学', '研究', 'データ'],
+            'emotional': ['感じ', '体験', '気持ち', '心', '愛', '幸せ'],
+            'lifestyle': ['生活', '日常', 'ライフ', 'スタイル', '暮らし']
+        }
+        
+        # 感情語・訴求指標の照合器（テキストを1回走査するだけで全カテゴリを照合）
+        self.lexicon_matcher = LexiconMatcher({
+            **{('emotion', category): words for category, words in self.emotional_words.items()},
+            **{('appeal', category): words for category, words in self.appeal_indicators.items()}
+        })
+        
+        # 個別コピー分析の永続キャッシュ（オプション）
+        self.analysis_cache = None
+        if cache_path:
+            self.analysis_cache = CopyAnalysisCache(cache_path, self._analysis_version_tag())
+        
         print("CopywriterStyleAnalyzer initialized")
     
+    def _analysis_version_tag(self) -> str:
+        """分析結果を左右する設定（分析器バージョン・辞書・MeCab有無）のハッシュ"""
+        config = {
+            'analyzer_version': ANALYZER_VERSION,
+            'emotional_words': self.emotional_words,
+            'industry_keywords': self.industry_keywords,
+            'appeal_indicators': self.appeal_indicators,
+            'mecab': bool(self.mecab and MECAB_AVAILABLE)
+        }
+        payload = json.dumps(config, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+    
     def load_copyworks_data(self) -> List[Dict]:
         """データベースからコピー作品データを読み込み"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT entry_id, copy_text, copywriter, client, industry, 
-                       media_type, year, award
-                FROM copy_works 
-                WHERE copy_text IS NOT NULL AND copy_text != ""
-                ORDER BY copywriter, year
-            ''')
-            
-            works = []
-            for row in cursor.fetchall():
-                works.append({
-                    'entry_id': row[0],
-                    'copy_text': row[1],
-                    'copywriter': row[2],
-                    'client': row[3],
-                    'industry': row[4],
-                    'media_type': row[5],
-                    'year': row[6],
-                    'award': row[7]
-                })
-            
-            conn.close()
+            works = [work for _, work in self._query_copyworks()]
             print(f"Loaded {len(works)} copy works")
             return works
             
@@ -155,6 +226,42 @@ class CopywriterStyleAnalyzer:
             print(f"Error loading data: {e}")
             return []
     
+    def _query_copyworks(self, after_rowid: int = 0) -> List[Tuple[int, Dict]]:
+        """rowidがafter_rowidより大きい作品を (rowid, 作品) の一覧で取得
+        
+        並びはコピーライター → 年 → rowid 順（同じ年の作品も毎回同じ順序になる）
+        """
+        with self.db.reader() as conn:
+            cursor = conn.execute('''
+                SELECT rowid, entry_id, copy_text, copywriter, client, industry, 
+                       media_type, year, award
+                FROM copy_works 
+                WHERE copy_text IS NOT NULL AND copy_text != "" AND rowid > ?
+                ORDER BY copywriter, year, rowid
+            ''', (after_rowid,))
+            
+            return [
+                (row[0], {
+                    'entry_id': row[1],
+                    'copy_text': row[2],
+                    'copywriter': row[3],
+                    'client': row[4],
+                    'industry': row[5],
+                    'media_type': row[6],
+                    'year': row[7],
+                    'award': row[8]
+                })
+                for row in cursor
+            ]
+    
+    def _count_copyworks(self, max_rowid: int) -> int:
+        """rowidがmax_rowid以下の分析対象作品数"""
+        with self.db.reader() as conn:
+            return conn.execute('''
+                SELECT COUNT(*) FROM copy_works
+                WHERE copy_text IS NOT NULL AND copy_text != "" AND rowid <= ?
+            ''', (max_rowid,)).fetchone()[0]
+    
     def analyze_single_copy(self, copy_data: Dict) -> CopyAnalysis:
         """個別コピー作品の詳細分析"""
         text = copy_data['copy_text']
@@ -163,26 +270,19 @@ class CopywriterStyleAnalyzer:
         length = len(text)
         sentence_count = len([s for s in re.split(r'[。！？]', text) if s.strip()])
         
-        # 形態素解析
-        if self.mecab and MECAB_AVAILABLE:
-            words = self.mecab.parse(text).strip().split()
-            word_count = len(words)
-            # より詳細な品詞分析も可能
-            pos_distribution = self._analyze_pos_distribution(text)
-        else:
-            # フォールバック: 簡易単語分割
-            words = re.findall(r'[ぁ-んァ-ヶー一-龠]+', text)
-            word_count = len(words)
-            pos_distribution = {}
+        # 形態素解析（1回のノード走査で表層形・品詞・原形を取得、MeCab無効時は簡易単語分割）
+        tokens = self.tokenizer.tokenize(text)
+        word_count = len(tokens.words)
+        pos_distribution = self._analyze_pos_distribution(tokens)
         
-        # キーワード抽出
-        keywords = self._extract_keywords(text, words)
+        # キーワード抽出（品詞情報がある場合は内容語の原形から）
+        keywords = self._extract_keywords(text, tokens.content_words())
         
         # 感情語抽出
-        emotional_words = self._extract_emotional_words(text)
+        emotional_words = self._extract_emotional_words(text, tokens)
         
         # トーン判定
-        tone = self._classify_tone(text, emotional_words)
+        tone = self._classify_tone(text, emotional_words, tokens)
         
         # ターゲット訴求判定
         target_appeal = self._classify_target_appeal(text)
@@ -205,17 +305,65 @@ class CopywriterStyleAnalyzer:
             complexity=complexity
         )
     
-    def _analyze_pos_distribution(self, text: str) -> Dict[str, int]:
+    def analyze_copies(self, works: List[Dict]) -> List[CopyAnalysis]:
+        """複数作品の分析（キャッシュ有効時は同一テキストの再分析を省略）"""
+        if self.analysis_cache is None:
+            self.tokenizer.tokenize_many(work['copy_text'] for work in works)
+            return [self.analyze_single_copy(work) for work in works]
+        
+        cached = self.analysis_cache.get_many(work['copy_text'] for work in works)
+        
+        # キャッシュに無いテキストはまとめてトークナイズ
+        self.tokenizer.tokenize_many(work['copy_text'] for work in works if work['copy_text'] not in cached)
+        
+        analyses = []
+        new_entries = {}
+        hits = 0
+        
+        for work in works:
+            text = work['copy_text']
+            fields = cached.get(text)
+            if fields is not None:
+                hits += 1
+                analyses.append(CopyAnalysis(
+                    entry_id=work['entry_id'],
+                    copy_text=text,
+                    copywriter=work['copywriter'],
+                    **fields
+                ))
+            else:
+                analysis = self.analyze_single_copy(work)
+                analyses.append(analysis)
+                new_entries[text] = {
+                    key: value for key, value in asdict(analysis).items()
+                    if key not in COPY_IDENTITY_FIELDS
+                }
+                # 同一テキストが同じバッチ内で再出現した場合は結果を再利用
+                cached[text] = new_entries[text]
+        
+        if new_entries:
+            self.analysis_cache.put_many(new_entries)
+        self.analysis_cache.record(hits, len(works) - hits)
+        
+        return analyses
+    
+    def get_cache_statistics(self) -> Optional[Dict]:
+        """分析キャッシュのヒット率（キャッシュ無効時はNone）"""
+        if self.analysis_cache is None:
+            return None
+        return self.analysis_cache.get_statistics()
+    
+    def _analyze_pos_distribution(self, tokens: TokenizedText) -> Dict[str, int]:
         """品詞分布分析（MeCab使用）"""
-        if not self.mecab:
+        if not tokens.has_pos:
             return {}
         
-        try:
-            # 詳細な品詞分析の実装
-            # 実際にはMeCabの形態素解析結果から品詞を抽出
-            return {'noun': 0, 'verb': 0, 'adjective': 0, 'particle': 0}
-        except:
-            return {}
+        distribution = {category: 0 for category in POS_CATEGORIES.values()}
+        for pos in tokens.pos:
+            category = POS_CATEGORIES.get(pos)
+            if category:
+                distribution[category] += 1
+        return distribution
     
     def _extract_keywords(self, text: str, words: List[str]) -> List[str]:
         """キーワード抽出"""
@@ -226,35 +374,42 @@ class CopywriterStyleAnalyzer:
                    if len(word) > 1 and not re.match(r'^[ぁ-ん]*$', word)]
         return keywords[:3]
     
-    def _extract_emotional_words(self, text: str) -> List[str]:
-        """感情語抽出"""
+    def _extract_emotional_words(self, text: str, tokens: Optional[TokenizedText] = None) -> List[str]:
+        """感情語抽出（活用形は原形で照合）"""
+        lemmas = set(tokens.base_forms) if tokens is not None else set()
+        hits = self.lexicon_matcher.find(text)
         emotional = []
         for category, words in self.emotional_words.items():
+            matched = set(hits[('emotion', category)])
             for word in words:
-                if word in text:
+                if word in matched or word in lemmas:
                     emotional.append(f"{word}({category})")
         return emotional
     
-    def _classify_tone(self, text: str, emotional_words: List[str]) -> str:
+    def _classify_tone(self, text: str, emotional_words: List[str],
+                       tokens: Optional[TokenizedText] = None) -> str:
         """トーン分類"""
+        # 断定表現: 品詞情報がある場合は助動詞「だ」（「である」の「で」を含む）で判定
+        if tokens is not None and tokens.has_pos:
+            assertive = tokens.has_lemma('だ', '助動詞')
+        else:
+            assertive = 'だ' in text or 'である' in text
+        
         if len(emotional_words) > 2:
             return 'emotional'
         elif '。' in text and '！' not in text and '？' not in text:
             return 'formal'
-        elif '！' in text or 'だ' in text or 'である' in text:
+        elif '！' in text or assertive:
             return 'assertive'
         else:
             return 'casual'
     
     def _classify_target_appeal(self, text: str) -> str:
         """訴求タイプ分類"""
-        logical_indicators = ['効果', '結果', '実証', '科学', '研究', 'データ']
-        emotional_indicators = ['感じ', '体験', '気持ち', '心', '愛', '幸せ']
-        lifestyle_indicators = ['生活', '日常', 'ライフ', 'スタイル', '暮らし']
-        
-        logical_score = sum(1 for word in logical_indicators if word in text)
-        emotional_score = sum(1 for word in emotional_indicators if word in text)
-        lifestyle_score = sum(1 for word in lifestyle_indicators if word in text)
+        counts = self.lexicon_matcher.count(text)
+        logical_score = counts[('appeal', 'logical')]
+        emotional_score = counts[('appeal', 'emotional')]
+        lifestyle_score = counts[('appeal', 'lifestyle')]
         
         if logical_score >= emotional_score and logical_score >= lifestyle_score:
             return 'logical'
@@ -272,108 +427,198 @@ class CopywriterStyleAnalyzer:
         else:
             return 'complex'
     
-    def analyze_copywriter_style(self, copywriter_name: str, works: List[Dict]) -> StyleMetrics:
+    def build_copywriter_index(self, works: List[Dict]) -> Dict[str, List[int]]:
+        """コピーライター → 作品オフセット一覧の索引を1パスで構築"""
+        index = defaultdict(list)
+        for offset, work in enumerate(works):
+            index[work['copywriter']].append(offset)
+        return dict(index)
+    
+    def analyze_copywriter_style(self, copywriter_name: str, works: List[Dict],
+                                 keyword_index: Optional[KeywordIndex] = None,
+                                 common_phrases: Optional[set] = None,
+                                 work_offsets: Optional[List[int]] = None) -> StyleMetrics:
         """特定コピーライターの総合スタイル分析"""
-        copywriter_works = [w for w in works if w['copywriter'] == copywriter_name]
+        if work_offsets is None:
+            work_offsets = [offset for offset, w in enumerate(works) if w['copywriter'] == copywriter_name]
         
-        if not copywriter_works:
-            return None
+        results = self.analyze_copywriters(
+            works, {copywriter_name: work_offsets}, keyword_index, common_phrases
+        )
+        return results.get(copywriter_name)
+    
+    def analyze_copywriters(self, works: List[Dict], copywriter_index: Dict[str, List[int]],
+                            keyword_index: Optional[KeywordIndex] = None,
+                            common_phrases: Optional[set] = None) -> Dict[str, StyleMetrics]:
+        """複数コピーライターの総合スタイル分析を一括実行
         
-        # 個別コピー分析
-        copy_analyses = [self.analyze_single_copy(work) for work in copywriter_works]
+        対象作品をアキュムレータに集計し、そこからStyleMetricsを作成する。
+        keyword_index省略時は全作品から索引を構築する（独自性は対象外のコピーライターとも比較する）。
+        """
+        if keyword_index is None:
+            keyword_index = self.build_keyword_index(works)
         
-        # 基本統計計算
-        lengths = [analysis.length for analysis in copy_analyses]
-        total_works = len(copywriter_works)
-        avg_length = np.mean(lengths) if lengths else 0
-        median_length = np.median(lengths) if lengths else 0
+        offsets = sorted(offset for writer_offsets in copywriter_index.values() for offset in writer_offsets)
+        aggregator = StyleAggregator()
+        self.update_style_aggregator(aggregator, [works[offset] for offset in offsets], ordinals=offsets)
         
-        # 語彙の豊富さ計算
-        all_keywords = []
-        for analysis in copy_analyses:
-            all_keywords.extend(analysis.keywords)
-        vocabulary_richness = len(set(all_keywords)) / len(all_keywords) if all_keywords else 0
+        results = {}
+        for name in copywriter_index:
+            if name in aggregator.accumulators:
+                results[name] = self.style_metrics_from_aggregator(
+                    aggregator, name, keyword_index, common_phrases
+                )
+        return results
+    
+    def update_style_aggregator(self, aggregator: StyleAggregator, works: List[Dict],
+                                ordinals: Optional[List[int]] = None) -> List[str]:
+        """作品バッチを集計に追加し、更新されたコピーライター一覧を返す
         
-        # 読みやすさスコア（簡易版）
-        avg_sentences = np.mean([a.sentence_count for a in copy_analyses]) if copy_analyses else 0
-        readability_score = max(0, 100 - avg_length/10 - avg_sentences*5)
+        計算量は追加分の作品数に比例する（既存作品は再分析しない）。
+        ordinalsは作品の通し番号で、省略時は集計済み作品の続きから採番する。
+        """
+        if ordinals is None:
+            ordinals = list(range(aggregator.next_ordinal, aggregator.next_ordinal + len(works)))
+        if ordinals:
+            aggregator.next_ordinal = max(aggregator.next_ordinal, max(ordinals) + 1)
         
-        # 感情的トーン
-        emotional_copies = sum(1 for a in copy_analyses if len(a.emotional_words) > 0)
-        emotional_tone_score = (emotional_copies / total_works) * 100 if total_works > 0 else 0
+        analyses = self.analyze_copies(works)
         
-        # 句読点頻度
-        punctuation_freq = self._calculate_punctuation_frequency(copywriter_works)
+        # 数値特徴は特徴行列のグループ集計でまとめて加算
+        grouped = defaultdict(lambda: ([], []))
+        for work, analysis in zip(works, analyses):
+            grouped[work['copywriter']][0].append(work)
+            grouped[work['copywriter']][1].append(analysis)
+        for name, partial in CorpusFeatureMatrix.build(grouped).group_partials().items():
+            aggregator.accumulator(name).add_numeric(**partial)
         
-        # トップキーワード
-        keyword_counter = Counter()
-        for analysis in copy_analyses:
-            keyword_counter.update(analysis.keywords)
-        top_keywords = keyword_counter.most_common(10)
+        # 語彙・分類・年代・n-gramは作品ごとに加算
+        for ordinal, work, analysis in zip(ordinals, works, analyses):
+            text = work['copy_text']
+            aggregator.accumulator(work['copywriter']).add_work(
+                ordinal, work, analysis, self.ngram_counter.count(text)
+            )
+            aggregator.add_writer_keywords(work['copywriter'], self._simple_keywords(text))
         
-        # テーマ分析
-        common_themes = self._extract_common_themes(copy_analyses)
+        return list(grouped)
+    
+    def refresh_style_aggregator(self, aggregator_path: str) -> StyleAggregator:
+        """保存済みの集計に前回以降に追加された作品だけを加算して保存し直す
         
-        # 業界特化度
-        industry_dist = Counter(work['industry'] for work in copywriter_works if work['industry'])
+        集計ファイルが無い場合や、分析設定の変更・作品の削除や置き換えで
+        前回の集計範囲の作品数が変わった場合は全作品から作り直す。
+        """
+        version = self._analysis_version_tag()
+        aggregator, metadata = StyleAggregator.load(aggregator_path)
+        last_rowid = metadata.get('last_rowid', 0)
         
-        # メディア選好
-        media_dist = Counter(work['media_type'] for work in copywriter_works if work['media_type'])
+        if aggregator is not None and (
+                metadata.get('analysis_version') != version
+                or metadata.get('db_path') != self.db_path
+                or self._count_copyworks(last_rowid) != metadata.get('work_count')):
+            print("Style aggregator is out of date, rebuilding from all works")
+            aggregator = None
+        if aggregator is None:
+            aggregator = StyleAggregator()
+            last_rowid = 0
+            metadata = {'work_count': 0}
         
-        # キャリア進化
-        career_evolution = self._analyze_career_evolution(copywriter_works)
+        rows = self._query_copyworks(last_rowid)
+        if rows:
+            self.update_style_aggregator(
+                aggregator,
+                [work for _, work in rows],
+                ordinals=[_work_order_key(work['year'], rowid) for rowid, work in rows]
+            )
         
-        # 活動期間
-        years = [work['year'] for work in copywriter_works if work['year']]
-        active_period = (min(years), max(years)) if years else (0, 0)
+        aggregator.save(aggregator_path, {
+            'analysis_version': version,
+            'db_path': self.db_path,
+            'last_rowid': max([last_rowid] + [rowid for rowid, _ in rows]),
+            'work_count': metadata['work_count'] + len(rows),
+            'updated_at': datetime.now().isoformat()
+        })
+        print(f"Style aggregator updated with {len(rows)} new works")
+        return aggregator
+    
+    def style_metrics_from_aggregator(self, aggregator: StyleAggregator, copywriter_name: str,
+                                      keyword_index: Optional[KeywordIndex] = None,
+                                      common_phrases: Optional[set] = None) -> StyleMetrics:
+        """集計済みアキュムレータからStyleMetricsを作成
+        
+        keyword_index省略時は集計に含まれる作品だけで独自性スコアを計算する。
+        """
+        accumulator = aggregator.accumulators[copywriter_name]
+        if keyword_index is None:
+            keyword_index = KeywordIndex(
+                writer_counts=dict(aggregator.keyword_writer_counts),
+                writer_keywords=aggregator.writer_keywords
+            )
         
-        # 独自性スコア
-        uniqueness_score = self._calculate_uniqueness_score(copywriter_name, copy_analyses, works)
+        total_works = accumulator.total_works
+        sums = accumulator.feature_sums
+        avg_length = sums['length'] / total_works
+        avg_sentences = sums['sentence_count'] / total_works
         
-        # シグネチャーフレーズ
-        signature_phrases = self._extract_signature_phrases(copy_analyses)
+        # 語彙の豊富さ計算
+        keyword_total = accumulator.keywords.total()
+        vocabulary_richness = len(accumulator.keywords) / keyword_total if keyword_total else 0
+        
+        # 読みやすさスコア（簡易版）
+        readability_score = max(0, 100 - avg_length/10 - avg_sentences*5)
+        
+        # 感情的トーン
+        emotional_tone_score = (sums['emotional'] / total_works) * 100
+        
+        # 句読点頻度（100文字あたりの出現頻度）
+        punctuation_freq = {
+            mark: (sums[mark] / sums['length'] * 100) if sums['length'] > 0 else 0
+            for mark in PUNCTUATION_MARKS
+        }
+        
+        # キャリア進化（年代別バケット）
+        career_evolution = [
+            {
+                'period': f"{decade}年代",
+                'works_count': bucket.works_count,
+                'avg_length': bucket.length_sum / bucket.works_count,
+                'themes': bucket.industries.keys_in_order()[:3]
+            }
+            for decade, bucket in sorted(accumulator.decades.items())
+        ]
+        
+        # 活動期間
+        if accumulator.first_year is not None:
+            active_period = (accumulator.first_year, accumulator.last_year)
+        else:
+            active_period = (0, 0)
         
         return StyleMetrics(
             copywriter_name=copywriter_name,
             total_works=total_works,
             avg_copy_length=avg_length,
-            median_copy_length=median_length,
+            median_copy_length=accumulator.median_length(),
             vocabulary_richness=vocabulary_richness,
             readability_score=readability_score,
             emotional_tone_score=emotional_tone_score,
             avg_sentences_per_copy=avg_sentences,
             punctuation_frequency=punctuation_freq,
-            top_keywords=top_keywords,
-            common_themes=common_themes,
-            industry_specialization=dict(industry_dist),
-            media_preference=dict(media_dist),
+            top_keywords=accumulator.keywords.most_common(10),
+            common_themes=self._extract_common_themes(accumulator.appeals, accumulator.tones),
+            industry_specialization=accumulator.industries.ordered_dict(),
+            media_preference=accumulator.media.ordered_dict(),
             career_evolution=career_evolution,
             active_period=active_period,
-            uniqueness_score=uniqueness_score,
-            signature_phrases=signature_phrases
+            uniqueness_score=self._calculate_uniqueness_score(
+                copywriter_name, set(accumulator.keywords.counts), keyword_index
+            ),
+            signature_phrases=accumulator.phrases.top_phrases(5, exclude=common_phrases)
         )
     
-    def _calculate_punctuation_frequency(self, works: List[Dict]) -> Dict[str, float]:
-        """句読点使用頻度計算"""
-        punctuation_marks = {'。': 0, '、': 0, '！': 0, '？': 0, '〜': 0}
-        total_chars = 0
-        
-        for work in works:
-            text = work['copy_text']
-            total_chars += len(text)
-            for mark in punctuation_marks:
-                punctuation_marks[mark] += text.count(mark)
-        
-        # 100文字あたりの出現頻度
-        return {mark: (count / total_chars * 100) if total_chars > 0 else 0 
-                for mark, count in punctuation_marks.items()}
-    
-    def _extract_common_themes(self, analyses: List[CopyAnalysis]) -> List[str]:
+    def _extract_common_themes(self, appeal_counter: FirstSeenCounter,
+                               tone_counter: FirstSeenCounter) -> List[str]:
         """共通テーマ抽出"""
-        # 訴求タイプの分布から主要テーマを判定
-        appeal_counter = Counter(analysis.target_appeal for analysis in analyses)
-        tone_counter = Counter(analysis.tone for analysis in analyses)
-        
+        # 訴求タイプ・トーンの分布から主要テーマを判定
         themes = []
         if appeal_counter.most_common(1):
             themes.append(f"主要訴求: {appeal_counter.most_common(1)[0][0]}")
@@ -382,107 +627,294 @@ class CopywriterStyleAnalyzer:
         
         return themes
     
-    def _analyze_career_evolution(self, works: List[Dict]) -> List[Dict]:
-        """キャリア進化分析"""
-        # 年代別の作品傾向変化を分析
-        year_groups = defaultdict(list)
+    def _simple_keywords(self, text: str) -> List[str]:
+        """簡易キーワード抽出（独自性比較用）"""
+        words = self.tokenizer.tokenize(text).runs
+        word_freq = Counter(words)
+        return [word for word, freq in word_freq.most_common(3) if len(word) > 1]
+    
+    def build_keyword_index(self, works: List[Dict]) -> KeywordIndex:
+        """全作品からキーワード → 使用コピーライター数の索引を構築"""
+        # 全作品を一括トークナイズ（以降の個別分析はメモから取得される）
+        self.tokenizer.tokenize_many(work['copy_text'] for work in works)
+        
+        writer_keywords = defaultdict(set)
         for work in works:
-            if work['year']:
-                decade = (work['year'] // 10) * 10
-                year_groups[decade].append(work)
+            writer_keywords[work['copywriter']].update(self._simple_keywords(work['copy_text']))
         
-        evolution = []
-        for decade, decade_works in sorted(year_groups.items()):
-            avg_length = np.mean([len(work['copy_text']) for work in decade_works])
-            evolution.append({
-                'period': f"{decade}年代",
-                'works_count': len(decade_works),
-                'avg_length': avg_length,
-                'themes': list(set(work['industry'] for work in decade_works if work['industry']))[:3]
-            })
+        writer_counts = Counter()
+        for keywords in writer_keywords.values():
+            writer_counts.update(keywords)
         
-        return evolution
+        return KeywordIndex(writer_counts=dict(writer_counts), writer_keywords=dict(writer_keywords))
     
-    def _calculate_uniqueness_score(self, copywriter_name: str, analyses: List[CopyAnalysis], all_works: List[Dict]) -> float:
+    def _calculate_uniqueness_score(self, copywriter_name: str, copywriter_keywords: set,
+                                    keyword_index: KeywordIndex) -> float:
         """独自性スコア計算"""
         # 他のコピーライターとの差異化度を測定
-        copywriter_keywords = set()
-        for analysis in analyses:
-            copywriter_keywords.update(analysis.keywords)
-        
-        # 他のコピーライターのキーワードを収集
-        other_keywords = set()
-        for work in all_works:
-            if work['copywriter'] != copywriter_name:
-                # 簡易キーワード抽出
-                words = re.findall(r'[ぁ-んァ-ヶー一-龠]+', work['copy_text'])
-                word_freq = Counter(words)
-                keywords = [word for word, freq in word_freq.most_common(3) if len(word) > 1]
-                other_keywords.update(keywords)
+        # 他のコピーライターのキーワード集合 = 索引全体 - このコピーライターしか使わない語
+        own_keywords = keyword_index.writer_keywords.get(copywriter_name, set())
+        exclusive_keywords = {kw for kw in own_keywords if keyword_index.writer_counts[kw] == 1}
+        other_keywords_count = len(keyword_index.writer_counts) - len(exclusive_keywords)
         
         # Jaccard係数の逆数（独自性の指標）
-        if not copywriter_keywords or not other_keywords:
+        if not copywriter_keywords or other_keywords_count == 0:
             return 50.0
         
-        intersection = len(copywriter_keywords & other_keywords)
-        union = len(copywriter_keywords | other_keywords)
+        intersection = sum(
+            1 for kw in copywriter_keywords
+            if kw in keyword_index.writer_counts and kw not in exclusive_keywords
+        )
+        union = len(copywriter_keywords) + other_keywords_count - intersection
         jaccard = intersection / union if union > 0 else 0
         uniqueness = (1 - jaccard) * 100
         
         return uniqueness
     
-    def _extract_signature_phrases(self, analyses: List[CopyAnalysis]) -> List[str]:
-        """シグネチャーフレーズ抽出"""
-        # 頻出する特徴的なフレーズを抽出
-        all_text = ' '.join(analysis.copy_text for analysis in analyses)
-        
-        # 2-3文字の頻出パターンを探索
-        phrases = []
-        for length in [2, 3, 4]:
-            for i in range(len(all_text) - length + 1):
-                phrase = all_text[i:i+length]
-                if re.match(r'^[ぁ-んァ-ヶー一-龠]+$', phrase) and all_text.count(phrase) >= 2:
-                    phrases.append(phrase)
-        
-        # 頻度でソートして上位を返す
-        phrase_counter = Counter(phrases)
-        return [phrase for phrase, count in phrase_counter.most_common(5)]
-    
-    def generate_comprehensive_report(self) -> Dict:
-        """包括的分析レポート生成"""
+    def build_corpus_ngram_statistics(self, works: List[Dict]) -> CorpusNGramStatistics:
+        """コーパス全体のn-gram統計構築"""
+        texts_by_writer = defaultdict(list)
+        for work in works:
+            texts_by_writer[work['copywriter']].append(work['copy_text'])
+        
+        ngram_stats = CorpusNGramStatistics(self.ngram_counter)
+        for texts in texts_by_writer.values():
+            ngram_stats.add_writer(texts)
+        return ngram_stats
+    
+    def _collect_ranking_sketches(self, works: List[Dict], method: str, k: int,
+                                  epsilon: float, delta: float, capacity: Optional[int] = None) -> Dict:
+        """コーパス全体（None）・年代別のキーワード／フレーズ頻度スケッチを作成"""
+        sketches = {}
+        
+        def scope_sketches(scope):
+            if scope not in sketches:
+                sketches[scope] = {
+                    'keywords': create_topk_sketch(method, k, epsilon, delta, capacity),
+                    'phrases': create_topk_sketch(method, k, epsilon, delta, capacity)
+                }
+            return sketches[scope]
+        
+        for work, analysis in zip(works, self.analyze_copies(works)):
+            scopes = [scope_sketches(None)]
+            if work['year']:
+                scopes.append(scope_sketches((work['year'] // 10) * 10))
+            
+            phrase_counts = self.ngram_counter.count(work['copy_text'])
+            for scope in scopes:
+                for keyword in analysis.keywords:
+                    scope['keywords'].add(keyword)
+                for phrase, (count, _, _) in phrase_counts.items():
+                    scope['phrases'].add(phrase, count)
+        
+        return sketches
+    
+    def _ranking_parameters(self, epsilon: Optional[float], delta: Optional[float],
+                            capacity: Optional[int]) -> Tuple[float, float, Optional[int]]:
+        """省略されたスケッチのパラメータを分析器の設定で補う"""
+        return (
+            self.ranking_epsilon if epsilon is None else epsilon,
+            self.ranking_delta if delta is None else delta,
+            self.ranking_capacity if capacity is None else capacity
+        )
+    
+    def build_corpus_rankings(self, works: List[Dict], k: int = 10, method: str = 'space_saving',
+                              epsilon: Optional[float] = None, delta: Optional[float] = None,
+                              capacity: Optional[int] = None) -> Dict:
+        """コーパス全体・年代別のキーワード／フレーズ頻度ランキング
+        
+        method='space_saving' / 'count_min' では語数によらず固定メモリで集計し、
+        各順位の出現数には error_bound 以下の誤差を含みうる。
+        epsilon・delta・capacity の省略時は分析器の ranking_* 設定を使う。
+        """
+        epsilon, delta, capacity = self._ranking_parameters(epsilon, delta, capacity)
+        sketches = self._collect_ranking_sketches(works, method, k, epsilon, delta, capacity)
+        
+        def ranking(scope_sketches):
+            return {
+                kind: {
+                    'top': sketch.top(k),
+                    'error_bound': sketch.error_bound()
+                }
+                for kind, sketch in scope_sketches.items()
+            }
+        
+        return {
+            'method': method,
+            'k': k,
+            'corpus': ranking(sketches[None]) if None in sketches else {},
+            'by_decade': {
+                f"{decade}年代": ranking(sketches[decade])
+                for decade in sorted(scope for scope in sketches if scope is not None)
+            }
+        }
+    
+    def measure_ranking_accuracy(self, works: List[Dict], k: int = 10, method: str = 'space_saving',
+                                 epsilon: Optional[float] = None, delta: Optional[float] = None,
+                                 capacity: Optional[int] = None) -> Dict:
+        """スケッチによるランキングを厳密カウントと比較（精度・誤差・保持エントリ数）"""
+        epsilon, delta, capacity = self._ranking_parameters(epsilon, delta, capacity)
+        exact = self._collect_ranking_sketches(works, 'exact', k, epsilon, delta)
+        approximate = self._collect_ranking_sketches(works, method, k, epsilon, delta, capacity)
+        
+        accuracy = {}
+        for scope, kinds in exact.items():
+            label = 'corpus' if scope is None else f"{scope}年代"
+            accuracy[label] = {}
+            for kind, exact_sketch in kinds.items():
+                sketch = approximate[scope][kind]
+                result = measure_topk_accuracy(sketch.top(k), exact_sketch.counts, k)
+                result.update({
+                    'error_bound': sketch.error_bound(),
+                    'memory_entries': sketch.memory_entries(),
+                    'exact_entries': exact_sketch.memory_entries()
+                })
+                accuracy[label][kind] = result
+        
+        return accuracy
+    
+    def generate_comprehensive_report(self, parallel: bool = False,
+                                      max_workers: Optional[int] = None,
+                                      aggregator_path: Optional[str] = None) -> Dict:
+        """包括的分析レポート生成
+        
+        parallel=True の場合、コピーライター単位の分析をプロセスプールに分散する。
+        結果は逐次実行と完全に一致する。
+        aggregator_path指定時はそこに保存した集計を使い、前回以降に追加された作品だけを分析する
+        （結果は全作品を分析した場合と一致し、更新した集計は同じパスへ保存する）。
+        """
+        # キャッシュ統計はこのレポートでのコーパス1回分の分析だけを数える
+        if self.analysis_cache is not None:
+            self.analysis_cache.reset_statistics()
+        
+        if aggregator_path is not None:
+            return self._generate_incremental_report(aggregator_path)
+        
         works = self.load_copyworks_data()
         if not works:
             return {"error": "No data available"}
         
-        # 全コピーライターの分析
-        copywriters = list(set(work['copywriter'] for work in works))
-        style_metrics = {}
+        # 全コピーライターの分析（作品の振り分けは索引で1回だけ行う）
+        copywriter_index = self.build_copywriter_index(works)
+        copywriters = list(copywriter_index)
         
         print(f"Analyzing {len(copywriters)} copywriters...")
         
-        for copywriter in copywriters:
-            print(f"Analyzing: {copywriter}")
-            metrics = self.analyze_copywriter_style(copywriter, works)
-            if metrics:
-                style_metrics[copywriter] = asdict(metrics)
+        # 独自性スコア用のキーワード索引はレポートごとに1回だけ構築
+        keyword_index = self.build_keyword_index(works)
+        
+        # 全員に共通するフレーズの除外（オプション）
+        common_phrases = self._corpus_common_phrases(works)
+        
+        if parallel:
+            style_metrics = self._analyze_copywriters_parallel(
+                works, copywriter_index, keyword_index, common_phrases, max_workers
+            )
+        else:
+            style_metrics = {
+                copywriter: asdict(metrics)
+                for copywriter, metrics in self.analyze_copywriters(
+                    works, copywriter_index, keyword_index, common_phrases
+                ).items()
+            }
+        
+        return self._assemble_report(style_metrics, len(works), lambda: works)
+    
+    def _generate_incremental_report(self, aggregator_path: str) -> Dict:
+        """保存済みの集計を新しい作品で更新してレポートを作成"""
+        aggregator = self.refresh_style_aggregator(aggregator_path)
+        if not aggregator.accumulators:
+            return {"error": "No data available"}
+        
+        # 全作品の読み込みは全体集計が必要なオプション（共通フレーズ除外・コーパスランキング）でのみ行う
+        works = None
+        
+        def load_works() -> List[Dict]:
+            nonlocal works
+            if works is None:
+                works = self.load_copyworks_data()
+            return works
+        
+        common_phrases = None
+        if self.common_phrase_ratio is not None:
+            common_phrases = self._corpus_common_phrases(load_works())
+        
+        # 独自性スコアは集計に含まれるキーワード索引（全作品分）で計算する
+        style_metrics = {
+            copywriter: asdict(self.style_metrics_from_aggregator(aggregator, copywriter, None, common_phrases))
+            for copywriter in sorted(aggregator.accumulators, key=_copywriter_sort_key)
+        }
+        total_works = sum(accumulator.total_works for accumulator in aggregator.accumulators.values())
+        
+        return self._assemble_report(style_metrics, total_works, load_works)
+    
+    def _corpus_common_phrases(self, works: List[Dict]) -> Optional[set]:
+        """common_phrase_ratio以上のコピーライターが使うフレーズ（未設定時はNone）"""
+        if self.common_phrase_ratio is None:
+            return None
+        ngram_stats = self.build_corpus_ngram_statistics(works)
+        return ngram_stats.common_phrases(self.common_phrase_ratio)
+    
+    def _assemble_report(self, style_metrics: Dict, total_works: int,
+                         load_works: Callable[[], List[Dict]]) -> Dict:
+        """コピーライター別の分析結果から全体統計・ランキングを加えたレポートを作成
+        
+        load_worksは全作品を返す関数（コーパスランキングを作る場合だけ呼び出す）
+        """
+        # ランキング集計で同じ作品を再分析する前に統計を確定
+        cache_statistics = self.get_cache_statistics()
         
         # 全体統計
+        total_copywriters = len(style_metrics)
         overall_stats = {
-            'total_copywriters': len(copywriters),
-            'total_works': len(works),
+            'total_copywriters': total_copywriters,
+            'total_works': total_works,
             'analysis_date': datetime.now().isoformat(),
-            'avg_works_per_copywriter': len(works) / len(copywriters) if copywriters else 0
+            'avg_works_per_copywriter': total_works / total_copywriters if total_copywriters else 0
         }
         
         # ランキング生成
         rankings = self._generate_rankings(style_metrics)
         
-        return {
+        report = {
             'overall_statistics': overall_stats,
             'copywriter_analyses': style_metrics,
             'rankings': rankings,
             'methodology': self._get_methodology_description()
         }
+        
+        if self.ranking_method:
+            report['corpus_rankings'] = self.build_corpus_rankings(load_works(), method=self.ranking_method)
+        
+        if cache_statistics is not None:
+            report['cache_statistics'] = cache_statistics
+        
+        return report
+    
+    def _analyze_copywriters_parallel(self, works: List[Dict], copywriter_index: Dict[str, List[int]],
+                                      keyword_index: KeywordIndex, common_phrases: Optional[set],
+                                      max_workers: Optional[int] = None) -> Dict:
+        """コピーライター単位の分析をプロセスプールで並列実行"""
+        max_workers = max_workers or os.cpu_count() or 1
+        tasks = list(copywriter_index.items())
+        chunksize = max(1, len(tasks) // (max_workers * 4))
+        
+        # 作品データと索引はinitializer経由でワーカーごとに1回だけ転送する
+        style_metrics = {}
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_report_worker,
+            initargs=(self.db_path, self.common_phrase_ratio, works, keyword_index, common_phrases,
+                      self.cache_path)
+        ) as executor:
+            for copywriter, metrics, cache_counts in executor.map(_analyze_copywriter_task, tasks, chunksize=chunksize):
+                if metrics:
+                    style_metrics[copywriter] = metrics
+                # ワーカー側のキャッシュヒット数を親プロセスの統計に合算
+                if self.analysis_cache is not None and cache_counts:
+                    self.analysis_cache.record(*cache_counts)
+        
+        return style_metrics
     
     def _generate_rankings(self, style_metrics: Dict) -> Dict:
         """各種ランキング生成"""
@@ -532,26 +964,108 @@ class CopywriterStyleAnalyzer:
             ]
         }
     
-    def export_analysis_results(self, report: Dict, filename: str = None):
-        """分析結果エクスポート"""
+    def export_analysis_results(self, report: Dict, filename: str = None, sharded: bool = False):
+        """分析結果エクスポート
+        
+        sharded=True の場合は filename をディレクトリとし、マニフェスト + コピーライター別レコードの
+        シャード形式で書き出す（PersonaDatabaseが必要なコピーライターだけを読み込める）
+        """
         if filename is None:
-            filename = f"/Users/naoki/copywriter_style_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            filename = f"/Users/naoki/copywriter_style_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            if not sharded:
+                filename += '.json'
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        if sharded:
+            write_sharded_analysis(report, filename, analysis_version=self._analysis_version_tag())
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
         
         print(f"Analysis results exported to: {filename}")
         return filename
 
+# 並列レポート用ワーカー状態（プロセスごとにinitializerで設定）
+_worker_context = {}
+
+def _init_report_worker(db_path: str, common_phrase_ratio: Optional[float], works: List[Dict],
+                        keyword_index: KeywordIndex, common_phrases: Optional[set],
+                        cache_path: Optional[str] = None):
+    """プロセスプール ワーカー初期化"""
+    _worker_context['analyzer'] = CopywriterStyleAnalyzer(db_path, common_phrase_ratio, cache_path)
+    _worker_context['works'] = works
+    _worker_context['keyword_index'] = keyword_index
+    _worker_context['common_phrases'] = common_phrases
+
+def _analyze_copywriter_task(task: Tuple[str, List[int]]) -> Tuple[str, Optional[Dict], Optional[Tuple[int, int]]]:
+    """ワーカー内で1人分のスタイル分析を実行（キャッシュのヒット・ミス増分も返す）"""
+    copywriter, work_offsets = task
+    analyzer = _worker_context['analyzer']
+    cache = analyzer.analysis_cache
+    if cache is not None:
+        cache.reset_statistics()
+    
+    metrics = analyzer.analyze_copywriter_style(
+        copywriter,
+        _worker_context['works'],
+        _worker_context['keyword_index'],
+        _worker_context['common_phrases'],
+        work_offsets=work_offsets
+    )
+    cache_counts = (cache.hits, cache.misses) if cache is not None else None
+    return copywriter, asdict(metrics) if metrics else None, cache_counts
+
+def benchmark_parallel_report(analyzer: CopywriterStyleAnalyzer, max_workers: Optional[int] = None) -> Dict:
+    """逐次・並列レポートの実行時間を比較し、結果の一致を検証"""
+    start = time.perf_counter()
+    serial_report = analyzer.generate_comprehensive_report()
+    serial_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    parallel_report = analyzer.generate_comprehensive_report(parallel=True, max_workers=max_workers)
+    parallel_seconds = time.perf_counter() - start
+    
+    # 分析日時以外は完全一致すること
+    # キャッシュ統計は2回目の実行でヒット率が変わるため比較対象外
+    for report in (serial_report, parallel_report):
+        report.get('overall_statistics', {}).pop('analysis_date', None)
+        report.pop('cache_statistics', None)
+    identical = serial_report == parallel_report
+    parallel_report.get('overall_statistics', {})['analysis_date'] = datetime.now().isoformat()
+    
+    speedup = serial_seconds / parallel_seconds if parallel_seconds > 0 else 0.0
+    print(f"Serial: {serial_seconds:.2f}s, Parallel: {parallel_seconds:.2f}s, "
+          f"Speedup: {speedup:.2f}x, Identical: {identical}")
+    
+    return {
+        'serial_seconds': serial_seconds,
+        'parallel_seconds': parallel_seconds,
+        'speedup': speedup,
+        'identical': identical,
+        'report': parallel_report
+    }
+
 # デモ実行
-def run_style_analysis_demo():
-    """スタイル分析デモ実行"""
+def run_style_analysis_demo(parallel: bool = False, sharded: bool = False, incremental: bool = False):
+    """スタイル分析デモ実行
+    
+    incremental=True の場合、前回保存した集計に新しい作品だけを追加して分析する。
+    """
     print("=== Copywriter Style Analysis Demo ===\n")
     
-    analyzer = CopywriterStyleAnalyzer('/Users/naoki/tcc_copyworks.db')
+    analyzer = CopywriterStyleAnalyzer(
+        '/Users/naoki/tcc_copyworks.db',
+        cache_path='/Users/naoki/copy_analysis_cache.db'
+    )
     
-    # 包括的分析実行
-    report = analyzer.generate_comprehensive_report()
+    # 包括的分析実行（並列モードでは逐次実行との速度比較も行う）
+    if parallel:
+        report = benchmark_parallel_report(analyzer)['report']
+    elif incremental:
+        report = analyzer.generate_comprehensive_report(
+            aggregator_path='/Users/naoki/copywriter_style_aggregator.pkl'
+        )
+    else:
+        report = analyzer.generate_comprehensive_report()
     
     if 'error' in report:
         print(f"Error: {report['error']}")
@@ -563,6 +1077,11 @@ def run_style_analysis_demo():
     print(f"  Total Works Analyzed: {report['overall_statistics']['total_works']}")
     print(f"  Avg Works per Copywriter: {report['overall_statistics']['avg_works_per_copywriter']:.1f}")
     
+    if 'cache_statistics' in report:
+        cache_stats = report['cache_statistics']
+        print(f"  Analysis Cache Hit Rate: {cache_stats['hit_rate']:.1%} "
+              f"({cache_stats['hits']} hits / {cache_stats['misses']} misses)")
+    
     print("\n🏆 Top Rankings:")
     
     if 'vocabulary_richness' in report['rankings']:
@@ -594,7 +1113,7 @@ def run_style_analysis_demo():
         print(f"  Active Period: {sample_analysis['active_period'][0]}-{sample_analysis['active_period'][1]}")
     
     # 結果エクスポート
-    filename = analyzer.export_analysis_results(report)
+    filename = analyzer.export_analysis_results(report, sharded=sharded)
     
     print(f"\n✅ Style analysis completed!")
     print(f"📁 Detailed report saved to: {filename}")
@@ -602,4 +1121,8 @@ def run_style_analysis_demo():
     return report
 
 if __name__ == "__main__":
-    demo_report = run_style_analysis_demo()
\ No newline at end of file
+    demo_report = run_style_analysis_demo(
+        parallel='--parallel' in sys.argv,
+        sharded='--sharded' in sys.argv,
+        incremental='--incremental' in sys.argv
+    )
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Work Example Index
+コピーライター別の作品例検索インデックス
+
+コピーライターの作品（コピー本文・クライアント・業種・媒体）を文字n-gramのBM25で索引化し、
+依頼内容（商品・ターゲット・キーメッセージ）に近い作品をfew-shot例として選ぶ。
+索引はコピーライターの作品例を初めて選ぶ時点で作成する
+"""
+
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+# 索引に使う文字n-gramの長さ
+NGRAM_SIZES = (2, 3)
+
+# BM25パラメータ
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 作品例として保持する項目
+EXAMPLE_FIELDS = ('copy_text', 'client', 'industry', 'media_type', 'year', 'award')
+
+# 索引対象の項目
+INDEXED_FIELDS = ('copy_text', 'client', 'industry', 'media_type')
+
+
+def char_ngrams(text: str, sizes: Iterable[int] = NGRAM_SIZES) -> Counter:
+    """文字n-gramの出現数（空白は区切りとして扱う）"""
+    grams = Counter()
+    for chunk in text.split():
+        for n in sizes:
+            for i in range(len(chunk) - n + 1):
+                grams[chunk[i:i + n]] += 1
+    return grams
+
+
+def _work_document(work: Dict) -> str:
+    return ' '.join(str(work[field]) for field in INDEXED_FIELDS if work.get(field))
+
+
+class ExampleIndex:
+    """1人分の作品例BM25インデックス"""
+    
+    def __init__(self, works: List[Dict], postings: Dict[str, List[int]], doc_lengths: List[int]):
+        self.works = works
+        # n-gram → [作品番号, 出現数, 作品番号, 出現数, ...]
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.avg_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0.0
+    
+    @classmethod
+    def build(cls, works: List[Dict]) -> 'ExampleIndex':
+        """作品一覧から索引を構築"""
+        examples = [{field: work.get(field) for field in EXAMPLE_FIELDS} for work in works]
+        postings: Dict[str, List[int]] = {}
+        doc_lengths = []
+        for doc_id, work in enumerate(examples):
+            grams = char_ngrams(_work_document(work))
+            doc_lengths.append(sum(grams.values()))
+            for gram, tf in grams.items():
+                postings.setdefault(gram, []).extend((doc_id, tf))
+        return cls(examples, postings, doc_lengths)
+    
+    def __len__(self) -> int:
+        return len(self.works)
+    
+    def scores(self, query: str) -> Dict[int, float]:
+        """クエリに対する作品ごとのBM25スコア（一致のない作品は含まない）"""
+        total = len(self.works)
+        scores: Dict[int, float] = {}
+        if not total:
+            return scores
+        
+        for gram in char_ngrams(query):
+            posting = self.postings.get(gram)
+            if not posting:
+                continue
+            df = len(posting) // 2
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for i in range(0, len(posting), 2):
+                doc_id, tf = posting[i], posting[i + 1]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        
+        return scores
+    
+    def search(self, query: str, k: int, fill: bool = True) -> List[Dict]:
+        """クエリに近い作品上位k件（同点は作品順）
+
+        fill=True の場合、一致する作品がk件に満たなければ残りを作品順に補う
+        """
+        scores = self.scores(query)
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))[:k]
+        if fill and len(ranked) < k:
+            selected = set(ranked)
+            ranked.extend(doc_id for doc_id in range(len(self.works)) if doc_id not in selected)
+            ranked = ranked[:k]
+        return [self.works[doc_id] for doc_id in ranked]
+
+
+def build_query(*parts: Optional[str]) -> str:
+    """依頼内容の各項目から検索クエリを作成"""
+    return ' '.join(part for part in parts if part)
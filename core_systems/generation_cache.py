@@ -0,0 +1,177 @@
+"""
+Generation Result Cache
+コピー生成結果のキャッシュ
+
+同じ依頼（ペルソナ・商品・ターゲット・キーメッセージ・強度など）の生成結果を、
+依頼の正規化ハッシュとペルソナ・プロンプトのバージョンをキーに保存する。
+メモリ上のLRUとSQLiteの永続層の2段構成で、有効期限(TTL)を過ぎた結果は使わない
+"""
+
+import json
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, is_dataclass
+from typing import Dict, Optional, Tuple
+
+from copy_database import get_copy_database
+
+# キャッシュ形式のバージョン（保存する結果の構造を変えたら上げる）
+GENERATION_CACHE_VERSION = 1
+
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_TTL = 7 * 24 * 3600  # 秒
+
+# 強度などの浮動小数点値を比較する桁数
+FLOAT_PRECISION = 4
+
+
+def _canonical(value):
+    """キャッシュキー用に値を正規化（文字列の前後空白・浮動小数点の誤差を無視）"""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, float):
+        return round(value, FLOAT_PRECISION)
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+class GenerationCache:
+    """生成結果の2段キャッシュ（メモリLRU + SQLite）"""
+    
+    def __init__(self, cache_path: Optional[str] = None, max_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 ttl: Optional[float] = DEFAULT_TTL):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        
+        # キー → (保存時刻, 結果JSON, 生成にかかった秒数)
+        # 結果はJSON文字列で持ち、取得のたびに新しい辞書を返す（呼び出し側の変更がキャッシュに及ばない）
+        self._memo: 'OrderedDict[str, Tuple[float, str, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.expired = 0
+        self.saved_latency = 0.0
+        
+        self.db = get_copy_database(cache_path) if cache_path else None
+        if self.db is not None:
+            with self.db.writer() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS generation_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        result TEXT NOT NULL,
+                        latency REAL,
+                        created_at REAL
+                    )
+                ''')
+    
+    @staticmethod
+    def make_key(request, version_tag: str) -> str:
+        """依頼の正規化JSON + ペルソナ・プロンプトのバージョンのハッシュ"""
+        fields = asdict(request) if is_dataclass(request) else dict(request)
+        payload = json.dumps(_canonical(fields), ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(f"{GENERATION_CACHE_VERSION}\0{version_tag}\0{payload}".encode('utf-8')).hexdigest()
+    
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+    
+    def _remember(self, key: str, entry: Tuple[float, str, float]):
+        self._memo[key] = entry
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """キャッシュ済みの結果を取得（無い・期限切れの場合はNone）"""
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is not None:
+                if not self._is_expired(entry[0]):
+                    self._memo.move_to_end(key)
+                    self.memory_hits += 1
+                    self.saved_latency += entry[2]
+                    return json.loads(entry[1])
+                del self._memo[key]
+                self.expired += 1
+        
+        if self.db is not None:
+            with self.db.reader() as conn:
+                row = conn.execute(
+                    "SELECT result, latency, created_at FROM generation_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+            if row is not None:
+                data, latency, created_at = row[0], row[1] or 0.0, row[2]
+                with self._lock:
+                    if not self._is_expired(created_at):
+                        self._remember(key, (created_at, data, latency))
+                        self.persistent_hits += 1
+                        self.saved_latency += latency
+                        return json.loads(data)
+                    self.expired += 1
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def put(self, key: str, result: Dict, latency: float):
+        """生成結果を保存"""
+        created_at = time.time()
+        data = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, (created_at, data, latency))
+        
+        if self.db is not None:
+            with self.db.writer() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO generation_cache (cache_key, result, latency, created_at) VALUES (?, ?, ?, ?)",
+                    (key, data, latency, created_at)
+                )
+    
+    def record_bypass(self):
+        """キャッシュを使わずに生成した依頼（fresh指定）を記録"""
+        with self._lock:
+            self.bypasses += 1
+    
+    def purge_expired(self) -> int:
+        """期限切れの結果を削除（削除した永続層の件数を返す）"""
+        if self.ttl is None:
+            return 0
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for key in [key for key, entry in self._memo.items() if entry[0] < cutoff]:
+                del self._memo[key]
+        if self.db is None:
+            return 0
+        with self.db.writer() as conn:
+            return conn.execute("DELETE FROM generation_cache WHERE created_at < ?", (cutoff,)).rowcount
+    
+    def clear(self):
+        """全ての結果を削除"""
+        with self._lock:
+            self._memo.clear()
+        if self.db is not None:
+            with self.db.writer() as conn:
+                conn.execute("DELETE FROM generation_cache")
+    
+    def get_statistics(self) -> Dict:
+        """キャッシュのヒット率と節約できた生成時間"""
+        hits = self.memory_hits + self.persistent_hits
+        total = hits + self.misses
+        return {
+            'entries': len(self._memo),
+            'memory_hits': self.memory_hits,
+            'persistent_hits': self.persistent_hits,
+            'misses': self.misses,
+            'bypasses': self.bypasses,
+            'expired': self.expired,
+            'hit_rate': hits / total if total > 0 else 0.0,
+            'saved_latency': self.saved_latency
+        }
@@ -0,0 +1,47 @@
+"""
+Lazy Imports
+重量級モジュールの遅延インポート
+
+anthropic・numpy などの読み込みを実際に使われる時点まで遅らせ、
+生成器の起動やモジュールのインポートを軽くする
+"""
+
+import importlib
+import importlib.util
+import threading
+
+
+class LazyModule:
+    """初回の属性アクセス時に実際のモジュールを読み込むプロキシ"""
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+    
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+    
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+    
+    def __repr__(self) -> str:
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def module_available(name: str) -> bool:
+    """モジュールを読み込まずにインストール有無を確認"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_import(name: str) -> LazyModule:
+    """遅延インポート用のモジュールプロキシを取得"""
+    return LazyModule(name)
@@ -0,0 +1,116 @@
+"""
+Lexicon Matcher
+辞書語の一括照合（Aho-Corasick法）
+
+カテゴリ別の語彙リストを1つのオートマトンにまとめ、テキストを1回走査するだけで
+全カテゴリの出現語を求める（pyahocorasickが利用できる場合はそちらを使用）
+"""
+
+from collections import defaultdict, deque
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+# 高速なC実装（利用できない場合は純Python実装を使用）
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+class LexiconMatcher:
+    """カテゴリ別語彙リストのマルチパターン照合器"""
+    
+    def __init__(self, lexicons: Dict[Hashable, Sequence[str]]):
+        self.lexicons = {category: list(words) for category, words in lexicons.items()}
+        
+        # 語 → 出現するカテゴリと語彙リスト内の位置（同じ語が複数カテゴリに属する場合もある）
+        self._entries: Dict[str, List[Tuple[Hashable, int]]] = defaultdict(list)
+        for category, words in self.lexicons.items():
+            for index, word in enumerate(words):
+                self._entries[word].append((category, index))
+        
+        # 空文字列は「word in text」と同様に常に一致扱い
+        self._always = list(self._entries.get('', []))
+        patterns = [word for word in self._entries if word]
+        
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for word in patterns:
+                self._automaton.add_word(word, word)
+            if patterns:
+                self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            self._build_automaton(patterns)
+        
+        # 同じテキストを複数の指標で照合する場合に備え、直前の結果を保持
+        self._last = (None, None)
+    
+    def _build_automaton(self, patterns: List[str]):
+        """goto・failure・出力関数を構築"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[List[str]] = [[]]
+        
+        for word in patterns:
+            state = 0
+            for ch in word:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(word)
+        
+        # 幅優先でfailureリンクを張り、出力をfailure先から継承
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+    
+    def _scan(self, text: str) -> set:
+        """テキストを1回走査して出現した語の集合を返す"""
+        if self._automaton is not None:
+            if not len(self._automaton):
+                return set()
+            return {word for _, word in self._automaton.iter(text)}
+        
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+    
+    def find(self, text: str) -> Dict[Hashable, List[str]]:
+        """カテゴリごとの出現語（語彙リストの順序）"""
+        last_text, last_hits = self._last
+        if last_text == text and last_hits is not None:
+            return last_hits
+        
+        positions = list(self._always)
+        for word in self._scan(text):
+            positions.extend(self._entries[word])
+        
+        hits = {category: [] for category in self.lexicons}
+        for category, index in sorted(positions, key=lambda entry: entry[1]):
+            hits[category].append(self.lexicons[category][index])
+        
+        self._last = (text, hits)
+        return hits
+    
+    def count(self, text: str) -> Dict[Hashable, int]:
+        """カテゴリごとの出現語数"""
+        return {category: len(words) for category, words in self.find(text).items()}
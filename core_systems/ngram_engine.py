@@ -0,0 +1,75 @@
+"""
+Character N-gram Engine
+文字n-gramカウントエンジン
+
+コピーテキストの2〜4文字フレーズを単一パスで数え上げ、
+シグネチャーフレーズ抽出とコーパス全体のフレーズ統計に利用する
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# フレーズとして扱う文字（ひらがな・カタカナ・長音・漢字）
+PHRASE_CHAR_PATTERN = re.compile(r'[ぁ-んァ-ヶー一-龠]')
+
+DEFAULT_NGRAM_LENGTHS = (2, 3, 4)
+
+
+class NGramCounter:
+    """単一パスの文字n-gramカウンタ"""
+    
+    def __init__(self, lengths: Tuple[int, ...] = DEFAULT_NGRAM_LENGTHS):
+        self.lengths = lengths
+    
+    def _phrase_runs(self, text: str) -> List[int]:
+        """各位置から始まるフレーズ文字の連続長（右から1パスで計算）"""
+        runs = [0] * (len(text) + 1)
+        for i in range(len(text) - 1, -1, -1):
+            if PHRASE_CHAR_PATTERN.match(text[i]):
+                runs[i] = runs[i + 1] + 1
+        return runs
+    
+    def count(self, text: str) -> Dict[str, List[int]]:
+        """n-gramごとの [出現数, 初出位置, 最終出現位置] を長さ順・初出順で返す"""
+        runs = self._phrase_runs(text)
+        stats = {}
+        
+        for length in self.lengths:
+            for i in range(len(text) - length + 1):
+                run = runs[i]
+                # 旧実装の re.match(r'^[...]+$') は末尾の改行1文字も許容していたため同じ扱いにする
+                if run < length and not (run == length - 1 and text[i + run] == '\n'):
+                    continue
+                
+                phrase = text[i:i + length]
+                entry = stats.get(phrase)
+                if entry is None:
+                    stats[phrase] = [1, i, i]
+                else:
+                    entry[0] += 1
+                    entry[2] = i
+        
+        return stats
+
+
+class CorpusNGramStatistics:
+    """コーパス全体のn-gram統計（フレーズを使うコピーライター数）"""
+    
+    def __init__(self, counter: Optional[NGramCounter] = None):
+        self.counter = counter or NGramCounter()
+        self.writer_frequency = Counter()
+        self.total_writers = 0
+    
+    def add_writer(self, texts: Iterable[str]):
+        """1人分の作品テキストを統計に追加"""
+        all_text = ' '.join(texts)
+        self.writer_frequency.update(self.counter.count(all_text).keys())
+        self.total_writers += 1
+    
+    def common_phrases(self, min_ratio: float) -> Set[str]:
+        """min_ratio以上のコピーライターが使う共通フレーズ"""
+        if self.total_writers == 0:
+            return set()
+        threshold = min_ratio * self.total_writers
+        return {phrase for phrase, count in self.writer_frequency.items() if count >= threshold}
@@ -0,0 +1,171 @@
+"""
+Persona Snapshot
+事前構築済みペルソナのスナップショット
+
+統合ペルソナ（スタイル指標・作品サンプル・ライティングパターン・生成プロンプト）を
+1ファイルに書き出し、起動時はmmapしたファイルのヘッダーだけを読む。
+各ペルソナは要求された時点でファイル上の該当範囲だけをデコードする。
+
+ファイル形式:
+    [固定長プレフィックス: マジック, 形式バージョン, ヘッダー長]
+    [ヘッダーJSON: 生成元のバージョン・ペルソナ索引 {名前: [オフセット, 長さ]}]
+    [ペルソナレコード（コンパクトJSON）の連結]
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from copy_database import CopyDatabase
+from style_artifact import MANIFEST_FILENAME
+
+SNAPSHOT_MAGIC = b'CWPSNAP\x00'
+SNAPSHOT_FORMAT_VERSION = 1
+
+# マジック(8バイト)・形式バージョン(uint32)・ヘッダー長(uint64)
+SNAPSHOT_PREFIX = struct.Struct('<8sIQ')
+
+
+def database_version(db: CopyDatabase) -> Optional[str]:
+    """作品DBのバージョン（作品数と最大rowid。作品の追加・削除で変わる）"""
+    try:
+        with db.reader() as conn:
+            count, max_rowid = conn.execute('SELECT COUNT(*), MAX(rowid) FROM copy_works').fetchone()
+        return f"{count}:{max_rowid or 0}"
+    except Exception as e:
+        logging.warning(f"Could not determine database version for {db.db_path}: {e}")
+        return None
+
+
+def file_version(path: str) -> Optional[str]:
+    """ファイルのバージョン（サイズと更新時刻。ファイルが無い場合はNone）"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def analysis_version(path: str) -> Optional[str]:
+    """分析結果のバージョン（シャード形式はマニフェスト、単一JSON形式はファイル自体）"""
+    if os.path.isdir(path):
+        path = os.path.join(path, MANIFEST_FILENAME)
+    return file_version(path)
+
+
+def process_memory_usage() -> Dict[str, int]:
+    """現在のプロセスのメモリ使用量（KB）
+    
+    Linuxでは /proc/self/smaps_rollup から共有ページを除いた専有量(uss)も求める。
+    それ以外の環境では最大RSS(max_rss)のみ
+    """
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty'):
+                    usage[key.lower()] = int(value.split()[0])
+        usage['uss'] = usage.get('private_clean', 0) + usage.get('private_dirty', 0)
+    except OSError:
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOSのru_maxrssはバイト単位
+        usage['max_rss'] = max_rss // 1024 if sys.platform == 'darwin' else max_rss
+    return usage
+
+
+def write_persona_snapshot(path: str, personas: Iterable[Tuple[str, Dict]], versions: Dict) -> Dict:
+    """ペルソナをスナップショットファイルに書き出す（一時ファイル経由で置き換え）"""
+    records = []
+    index = {}
+    offset = 0
+    for name, persona in personas:
+        if persona is None:
+            continue
+        data = json.dumps(persona, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        records.append(data)
+        index[name] = [offset, len(data)]
+        offset += len(data)
+    
+    header = json.dumps({
+        'versions': versions,
+        'created_at': datetime.now().isoformat(),
+        'personas': index
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(SNAPSHOT_PREFIX.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(header)))
+        f.write(header)
+        for data in records:
+            f.write(data)
+    # 既存のスナップショットを開いているプロセスは古いファイルを読み続けられる
+    os.replace(tmp_path, path)
+    
+    return {
+        'path': path,
+        'personas': len(index),
+        'bytes': SNAPSHOT_PREFIX.size + len(header) + offset
+    }
+
+
+class PersonaSnapshot:
+    """mmapしたペルソナスナップショット（読み取り専用）"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        try:
+            magic, format_version, header_length = SNAPSHOT_PREFIX.unpack_from(self._mmap, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"Not a persona snapshot: {path}")
+            if format_version != SNAPSHOT_FORMAT_VERSION:
+                raise ValueError(f"Unsupported persona snapshot format: {format_version}")
+            
+            header_start = SNAPSHOT_PREFIX.size
+            header = json.loads(self._mmap[header_start:header_start + header_length].decode('utf-8'))
+        except Exception:
+            self._mmap.close()
+            raise
+        
+        self.versions: Dict = header['versions']
+        self.created_at: str = header['created_at']
+        self.index: Dict[str, List[int]] = header['personas']
+        self._data_start = header_start + header_length
+    
+    def writers(self) -> List[str]:
+        """スナップショット内のペルソナ名一覧"""
+        return list(self.index)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def load(self, name: str) -> Optional[Dict]:
+        """ペルソナ1件をデコード"""
+        entry = self.index.get(name)
+        if entry is None:
+            return None
+        offset, length = entry
+        start = self._data_start + offset
+        return json.loads(self._mmap[start:start + length].decode('utf-8'))
+    
+    def stale_keys(self, current_versions: Dict) -> List[str]:
+        """生成元のバージョンが現在と異なる項目"""
+        return [
+            key for key, version in current_versions.items()
+            if version is None or self.versions.get(key) != version
+        ]
+    
+    def close(self):
+        self._mmap.close()
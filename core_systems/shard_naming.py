@@ -0,0 +1,20 @@
+"""
+Shard File Naming
+コピーライター別シャードのファイル名
+
+作品データのエクスポート（tcc_data_scraper）とスタイル分析結果（style_artifact）の
+コピーライター別ファイルで同じ命名規則を使う
+"""
+
+import hashlib
+import re
+
+# ファイル名に使えない文字と空白
+UNSAFE_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+def writer_file_stem(name: str) -> str:
+    """コピーライター名からファイル名の語幹を生成（使えない文字は置換し、名前のハッシュで一意にする）"""
+    safe_name = UNSAFE_FILENAME_CHARS.sub('_', name).strip('._') or 'unknown'
+    digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]
+    return f"{safe_name}_{digest}"
@@ -0,0 +1,221 @@
+"""
+Top-k Sketches
+固定メモリの頻出語スケッチ
+
+コーパス全体・年代別のキーワード／フレーズ頻度ランキングを、全語を保持する
+Counterの代わりに誤差上限を指定したスケッチで近似する
+- SpaceSaving: カウンタ数 ceil(1/epsilon)、各推定値の誤差は epsilon * N 以下
+- CountMin: 幅 ceil(e/epsilon) × 深さ ceil(ln(1/delta))、確率 1-delta で誤差 epsilon * N 以下
+"""
+
+import math
+import heapq
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from lazy_imports import lazy_import
+
+# Count-Min スケッチでのみ使用
+np = lazy_import('numpy')
+
+DEFAULT_EPSILON = 0.001
+DEFAULT_DELTA = 0.01
+
+# CountMinで頻出候補として保持する語数（kに対する倍率）
+CANDIDATE_FACTOR = 4
+
+SKETCH_METHODS = ('exact', 'space_saving', 'count_min')
+
+
+class ExactTopK:
+    """厳密カウント（精度比較の基準）"""
+    
+    def __init__(self):
+        self.counts = Counter()
+        self.total = 0
+    
+    def add(self, key: str, n: int = 1):
+        self.counts[key] += n
+        self.total += n
+    
+    def merge(self, other: 'ExactTopK'):
+        self.counts.update(other.counts)
+        self.total += other.total
+    
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        return self.counts.most_common(k)
+    
+    def error_bound(self) -> float:
+        return 0.0
+    
+    def memory_entries(self) -> int:
+        return len(self.counts)
+
+
+class SpaceSavingSketch:
+    """Space-Saving法による頻出語スケッチ"""
+    
+    def __init__(self, epsilon: float = DEFAULT_EPSILON, capacity: Optional[int] = None):
+        self.capacity = capacity or math.ceil(1 / epsilon)
+        self.counts: Dict[str, int] = {}
+        # 置き換え時に引き継いだ過大評価分
+        self.errors: Dict[str, int] = {}
+        self.total = 0
+        
+        # 最小カウンタ探索用ヒープ（古いエントリは遅延削除）
+        self._heap: List[Tuple[int, str]] = []
+    
+    def _push(self, key: str):
+        heapq.heappush(self._heap, (self.counts[key], key))
+        if len(self._heap) > CANDIDATE_FACTOR * self.capacity:
+            self._heap = [(count, key) for key, count in self.counts.items()]
+            heapq.heapify(self._heap)
+    
+    def _pop_min(self) -> Tuple[str, int]:
+        """現在の最小カウンタを取り出す"""
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return key, count
+    
+    def add(self, key: str, n: int = 1):
+        self.total += n
+        if key in self.counts:
+            self.counts[key] += n
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = n
+            self.errors[key] = 0
+        else:
+            # 最小カウンタを置き換え、その値を誤差として引き継ぐ
+            min_key, min_count = self._pop_min()
+            del self.counts[min_key]
+            del self.errors[min_key]
+            self.counts[key] = min_count + n
+            self.errors[key] = min_count
+        self._push(key)
+    
+    def _floor(self) -> int:
+        """未登録語の出現数の上限"""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+    
+    def merge(self, other: 'SpaceSavingSketch'):
+        """他のスケッチをマージ（Agarwal et al. の方式、誤差上限は加算される）"""
+        self_floor, other_floor = self._floor(), other._floor()
+        merged = {}
+        for key in set(self.counts) | set(other.counts):
+            count = self.counts.get(key, self_floor) + other.counts.get(key, other_floor)
+            error = self.errors.get(key, self_floor) + other.errors.get(key, other_floor)
+            merged[key] = (count, error)
+        
+        kept = heapq.nlargest(self.capacity, merged.items(), key=lambda item: item[1][0])
+        self.counts = {key: count for key, (count, _) in kept}
+        self.errors = {key: error for key, (_, error) in kept}
+        self.total += other.total
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+    
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        return heapq.nlargest(k, self.counts.items(), key=lambda item: item[1])
+    
+    def guaranteed_count(self, key: str) -> int:
+        """確実に出現した回数の下限"""
+        return self.counts.get(key, 0) - self.errors.get(key, 0)
+    
+    def error_bound(self) -> float:
+        return self.total / self.capacity
+    
+    def memory_entries(self) -> int:
+        return len(self.counts)
+
+
+class CountMinSketch:
+    """Count-Min スケッチ + 頻出候補の保持による上位k件推定"""
+    
+    def __init__(self, k: int, epsilon: float = DEFAULT_EPSILON, delta: float = DEFAULT_DELTA):
+        self.k = k
+        self.epsilon = epsilon
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self._rows = np.arange(self.depth)
+        self.total = 0
+        
+        # 推定値の大きい候補（上限 CANDIDATE_FACTOR * k 件）
+        self.candidates: Dict[str, int] = {}
+        self.candidate_capacity = CANDIDATE_FACTOR * k
+    
+    def _columns(self, key: str) -> List[int]:
+        """行ごとのハッシュ列（プロセス間で同じ値になるようcrc32を使用）"""
+        data = key.encode('utf-8')
+        return [zlib.crc32(data, row + 1) % self.width for row in range(self.depth)]
+    
+    def estimate(self, key: str) -> int:
+        columns = self._columns(key)
+        return int(min(self.table[row, column] for row, column in enumerate(columns)))
+    
+    def add(self, key: str, n: int = 1):
+        columns = self._columns(key)
+        self.table[self._rows, columns] += n
+        self.total += n
+        
+        self.candidates[key] = int(self.table[self._rows, columns].min())
+        self._prune()
+    
+    def _prune(self):
+        """候補が上限の2倍に達したら推定値の上位だけを残す"""
+        if len(self.candidates) >= 2 * self.candidate_capacity:
+            kept = heapq.nlargest(self.candidate_capacity, self.candidates.items(), key=lambda item: item[1])
+            self.candidates = dict(kept)
+    
+    def merge(self, other: 'CountMinSketch'):
+        """同じ幅・深さのスケッチをマージ"""
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Cannot merge Count-Min sketches with different dimensions")
+        self.table += other.table
+        self.total += other.total
+        for key in set(self.candidates) | set(other.candidates):
+            self.candidates[key] = self.estimate(key)
+        self._prune()
+    
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        return heapq.nlargest(k, ((key, self.estimate(key)) for key in self.candidates), key=lambda item: item[1])
+    
+    def error_bound(self) -> float:
+        return self.epsilon * self.total
+    
+    def memory_entries(self) -> int:
+        return self.table.size + len(self.candidates)
+
+
+def create_topk_sketch(method: str, k: int, epsilon: float = DEFAULT_EPSILON, delta: float = DEFAULT_DELTA,
+                       capacity: Optional[int] = None):
+    """方式名からスケッチを作成（capacityはSpaceSavingのカウンタ数、省略時は ceil(1/epsilon)）"""
+    if method == 'exact':
+        return ExactTopK()
+    if method == 'space_saving':
+        return SpaceSavingSketch(epsilon, capacity)
+    if method == 'count_min':
+        return CountMinSketch(k, epsilon, delta)
+    raise ValueError(f"Unknown sketch method: {method} (expected one of {SKETCH_METHODS})")
+
+
+def measure_topk_accuracy(approximate: List[Tuple[str, int]], exact_counts: Counter, k: int) -> Dict:
+    """近似上位k件を厳密カウントと比較"""
+    exact_top = exact_counts.most_common(k)
+    if not exact_top:
+        return {'precision': 1.0, 'max_count_error': 0, 'mean_count_error': 0.0}
+    
+    # 同数のk位を含めた正解集合（同数の入れ替わりは誤りとしない）
+    kth_count = exact_top[-1][1]
+    relevant = {key for key, count in exact_counts.items() if count >= kth_count}
+    hits = sum(1 for key, _ in approximate[:k] if key in relevant)
+    
+    errors = [abs(count - exact_counts.get(key, 0)) for key, count in approximate[:k]]
+    return {
+        'precision': hits / min(k, len(exact_top)),
+        'max_count_error': max(errors) if errors else 0,
+        'mean_count_error': sum(errors) / len(errors) if errors else 0.0
+    }
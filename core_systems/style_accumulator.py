@@ -0,0 +1,291 @@
+"""
+Style Accumulators
+マージ可能なスタイル指標アキュムレータ
+
+コピーライターごとのStyleMetricsを、件数・合計・文字数ヒストグラム・初出順序付きカウンタ・
+年代別バケットなどの加算可能な状態として保持する。新しい作品の追加は追加分だけの計算で済み、
+並列シャードで作った部分集計も逐次集計と完全に同じ結果になるようにマージできる。
+集計はファイルに保存でき、次回は前回以降に追加された作品だけを加算して更新できる
+"""
+
+import os
+import pickle
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# 出現順序キー（作品の通し番号を先頭に含むタプル）
+OrderKey = Tuple[int, ...]
+
+# 集計ファイルの形式バージョン（アキュムレータの構造を変えたら上げる）
+AGGREGATOR_FORMAT_VERSION = 1
+
+
+class FirstSeenCounter:
+    """初出順序付きカウンタ
+
+    Counter.most_common と同じく同数の場合は初出順で並べる。
+    初出位置を保持するため、どの順序でマージしても逐次集計と同じ結果になる。
+    """
+    
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self.first_seen: Dict[str, OrderKey] = {}
+    
+    def add(self, key: str, order: OrderKey, n: int = 1):
+        """出現を加算"""
+        if key in self.counts:
+            self.counts[key] += n
+            if order < self.first_seen[key]:
+                self.first_seen[key] = order
+        else:
+            self.counts[key] = n
+            self.first_seen[key] = order
+    
+    def merge(self, other: 'FirstSeenCounter'):
+        """他のカウンタを加算"""
+        for key, n in other.counts.items():
+            self.add(key, other.first_seen[key], n)
+    
+    def keys_in_order(self) -> List[str]:
+        """初出順のキー一覧"""
+        return sorted(self.counts, key=self.first_seen.__getitem__)
+    
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """出現数の多い順（同数は初出順）"""
+        ranked = sorted(self.keys_in_order(), key=lambda key: -self.counts[key])
+        return [(key, self.counts[key]) for key in ranked[:n]]
+    
+    def ordered_dict(self) -> Dict[str, int]:
+        """初出順の {キー: 出現数}"""
+        return {key: self.counts[key] for key in self.keys_in_order()}
+    
+    def total(self) -> int:
+        """出現数の合計"""
+        return sum(self.counts.values())
+    
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+class PhraseAccumulator:
+    """シグネチャーフレーズ用のn-gram集計
+
+    フレーズごとに [出現数, 順序キー, 重ならない2回目の出現があるか] を保持する。
+    順序キーは (フレーズ長, 作品番号, 作品内の初出位置) で、全作品を連結して数えた場合の並びと一致する。
+    """
+    
+    def __init__(self):
+        self.stats: Dict[str, list] = {}
+    
+    def add_text(self, ordinal: int, phrase_counts: Dict[str, List[int]]):
+        """1作品分のn-gram集計（NGramCounter.count の結果）を追加"""
+        for phrase, (count, first, last) in phrase_counts.items():
+            self._add(phrase, count, (len(phrase), ordinal, first), last - first >= len(phrase))
+    
+    def _add(self, phrase: str, count: int, order: OrderKey, repeated: bool):
+        entry = self.stats.get(phrase)
+        if entry is None:
+            self.stats[phrase] = [count, order, repeated]
+        else:
+            entry[0] += count
+            entry[1] = min(entry[1], order)
+            # 別の作品にも出現していれば重ならない2回目の出現がある
+            entry[2] = True
+    
+    def merge(self, other: 'PhraseAccumulator'):
+        """他の集計を加算"""
+        for phrase, (count, order, repeated) in other.stats.items():
+            self._add(phrase, count, order, repeated)
+    
+    def top_phrases(self, n: int = 5, exclude: Optional[Set[str]] = None) -> List[str]:
+        """繰り返し使われるフレーズ上位n件（出現数の降順、同数は初出順）"""
+        candidates = [
+            (phrase, entry) for phrase, entry in self.stats.items()
+            if entry[2] and not (exclude and phrase in exclude)
+        ]
+        candidates.sort(key=lambda item: (-item[1][0], item[1][1]))
+        return [phrase for phrase, _ in candidates[:n]]
+
+
+@dataclass
+class DecadeBucket:
+    """年代別バケット"""
+    works_count: int = 0
+    length_sum: int = 0
+    industries: FirstSeenCounter = field(default_factory=FirstSeenCounter)
+    
+    def merge(self, other: 'DecadeBucket'):
+        self.works_count += other.works_count
+        self.length_sum += other.length_sum
+        self.industries.merge(other.industries)
+
+
+@dataclass
+class StyleAccumulator:
+    """1人分のStyleMetricsを再構成できる加算可能な状態"""
+    copywriter_name: str
+    
+    # 件数・合計（列は style_features.FEATURE_COLUMNS のうち年以外）
+    total_works: int = 0
+    feature_sums: Counter = field(default_factory=Counter)
+    
+    # 中央値用の文字数ヒストグラム（文字数は小さな整数なので厳密に保持できる）
+    length_histogram: Counter = field(default_factory=Counter)
+    
+    # 活動期間
+    first_year: Optional[int] = None
+    last_year: Optional[int] = None
+    
+    # 初出順序付きカウンタ
+    keywords: FirstSeenCounter = field(default_factory=FirstSeenCounter)
+    appeals: FirstSeenCounter = field(default_factory=FirstSeenCounter)
+    tones: FirstSeenCounter = field(default_factory=FirstSeenCounter)
+    industries: FirstSeenCounter = field(default_factory=FirstSeenCounter)
+    media: FirstSeenCounter = field(default_factory=FirstSeenCounter)
+    
+    # 年代別バケット・n-gram集計
+    decades: Dict[int, DecadeBucket] = field(default_factory=dict)
+    phrases: PhraseAccumulator = field(default_factory=PhraseAccumulator)
+    
+    def add_numeric(self, works_count: int, sums: Dict[str, int], length_histogram: Dict[int, int],
+                    year_range: Optional[Tuple[int, int]]):
+        """数値特徴の部分集計（特徴行列のグループ集計）を加算"""
+        self.total_works += works_count
+        self.feature_sums.update(sums)
+        self.length_histogram.update(length_histogram)
+        if year_range is not None:
+            self._update_years(*year_range)
+    
+    def _update_years(self, first_year: int, last_year: int):
+        if self.first_year is None or first_year < self.first_year:
+            self.first_year = first_year
+        if self.last_year is None or last_year > self.last_year:
+            self.last_year = last_year
+    
+    def add_work(self, ordinal: int, work: Dict, analysis, phrase_counts: Dict[str, List[int]]):
+        """1作品分の語彙・分類・年代情報を追加（ordinalは作品の通し番号）"""
+        for position, keyword in enumerate(analysis.keywords):
+            self.keywords.add(keyword, (ordinal, position))
+        self.appeals.add(analysis.target_appeal, (ordinal,))
+        self.tones.add(analysis.tone, (ordinal,))
+        if work['industry']:
+            self.industries.add(work['industry'], (ordinal,))
+        if work['media_type']:
+            self.media.add(work['media_type'], (ordinal,))
+        
+        if work['year']:
+            decade = (work['year'] // 10) * 10
+            bucket = self.decades.setdefault(decade, DecadeBucket())
+            bucket.works_count += 1
+            bucket.length_sum += analysis.length
+            if work['industry']:
+                bucket.industries.add(work['industry'], (ordinal,))
+        
+        self.phrases.add_text(ordinal, phrase_counts)
+    
+    def merge(self, other: 'StyleAccumulator'):
+        """同じコピーライターの部分集計を加算"""
+        self.total_works += other.total_works
+        self.feature_sums.update(other.feature_sums)
+        self.length_histogram.update(other.length_histogram)
+        if other.first_year is not None:
+            self._update_years(other.first_year, other.last_year)
+        
+        self.keywords.merge(other.keywords)
+        self.appeals.merge(other.appeals)
+        self.tones.merge(other.tones)
+        self.industries.merge(other.industries)
+        self.media.merge(other.media)
+        
+        for decade, bucket in other.decades.items():
+            self.decades.setdefault(decade, DecadeBucket()).merge(bucket)
+        self.phrases.merge(other.phrases)
+    
+    def median_length(self) -> float:
+        """文字数の中央値（np.medianと同じく中央2値の平均）"""
+        total = sum(self.length_histogram.values())
+        if total == 0:
+            return 0
+        
+        lower_rank, upper_rank = (total - 1) // 2, total // 2
+        lower = upper = None
+        seen = 0
+        for length in sorted(self.length_histogram):
+            seen += self.length_histogram[length]
+            if lower is None and seen > lower_rank:
+                lower = length
+            if seen > upper_rank:
+                upper = length
+                break
+        return (lower + upper) / 2
+
+
+class StyleAggregator:
+    """コーパス全体の集計（コピーライター別アキュムレータ + 独自性スコア用キーワード索引）"""
+    
+    def __init__(self):
+        self.accumulators: Dict[str, StyleAccumulator] = {}
+        
+        # コピーライター → 簡易キーワード集合、キーワード → 使用コピーライター数
+        self.writer_keywords: Dict[str, Set[str]] = {}
+        self.keyword_writer_counts: Counter = Counter()
+        
+        # 次に追加する作品の通し番号
+        self.next_ordinal = 0
+    
+    def accumulator(self, copywriter_name: str) -> StyleAccumulator:
+        """コピーライターのアキュムレータ（無ければ作成）"""
+        accumulator = self.accumulators.get(copywriter_name)
+        if accumulator is None:
+            accumulator = self.accumulators[copywriter_name] = StyleAccumulator(copywriter_name)
+        return accumulator
+    
+    def add_writer_keywords(self, copywriter_name: str, keywords: Iterable[str]):
+        """コピーライターの簡易キーワードを索引に追加"""
+        known = self.writer_keywords.setdefault(copywriter_name, set())
+        new_keywords = set(keywords) - known
+        known.update(new_keywords)
+        self.keyword_writer_counts.update(new_keywords)
+    
+    def merge(self, other: 'StyleAggregator'):
+        """他シャードの集計をマージ（作品の通し番号は重複しないこと）"""
+        for name, accumulator in other.accumulators.items():
+            self.accumulator(name).merge(accumulator)
+        for name, keywords in other.writer_keywords.items():
+            self.add_writer_keywords(name, keywords)
+        self.next_ordinal = max(self.next_ordinal, other.next_ordinal)
+    
+    def save(self, path: str, metadata: Optional[Dict] = None):
+        """集計をファイルに保存（一時ファイルに書いてから置き換える）
+        
+        metadataには集計済みの範囲など、次回の追加更新に必要な情報を入れる。
+        """
+        payload = {
+            'format_version': AGGREGATOR_FORMAT_VERSION,
+            'metadata': metadata or {},
+            'aggregator': self
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str) -> Tuple[Optional['StyleAggregator'], Dict]:
+        """保存した集計を読み込み (集計, metadata) を返す
+        
+        ファイルが無い・壊れている・形式バージョンが異なる場合は (None, {})。
+        pickle形式のため、自分で保存した信頼できるファイルだけを読み込むこと。
+        """
+        try:
+            with open(path, 'rb') as f:
+                payload = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None, {}
+        
+        if (not isinstance(payload, dict)
+                or payload.get('format_version') != AGGREGATOR_FORMAT_VERSION
+                or not isinstance(payload.get('aggregator'), cls)):
+            return None, {}
+        return payload['aggregator'], payload.get('metadata') or {}
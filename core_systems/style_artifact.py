@@ -0,0 +1,172 @@
+"""
+Sharded Style Analysis Artifact
+シャード化されたスタイル分析結果
+
+分析レポートを、全体統計・ランキング・コピーライター索引を持つ小さなマニフェストと、
+コピーライターごとの1レコード1ファイルに分けて保存する。
+読み込み側はマニフェストだけを開き、各コピーライターの指標は要求された時点で読む。
+従来の単一JSON形式のレポートも同じインターフェースで読める
+
+レコードのファイル名には内容のハッシュを含め、既存のファイルは書き換えない。
+マニフェストの置き換えで全レコードが一度に切り替わり、読み込み中の旧マニフェストが指す
+レコードは1世代分残す
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from shard_naming import writer_file_stem
+
+MANIFEST_FILENAME = 'manifest.json'
+RECORDS_DIRNAME = 'copywriters'
+
+# シャード形式のバージョン（レコードの構造を変えたら上げる）
+ARTIFACT_FORMAT_VERSION = 1
+
+# マニフェストに残すレポートのキー（copywriter_analyses 以外）
+SUMMARY_KEYS = ('overall_statistics', 'rankings', 'methodology', 'corpus_rankings', 'cache_statistics')
+
+
+def _record_filename(name: str, data: bytes) -> str:
+    """コピーライター名とレコード内容からレコードファイル名を生成"""
+    content_digest = hashlib.sha1(data).hexdigest()[:12]
+    return f"{writer_file_stem(name)}_{content_digest}.json"
+
+
+def _write_file_atomic(path: str, data: bytes):
+    """一時ファイル経由で書き込み、完全な内容のファイルだけが見えるようにする"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _manifest_record_files(manifest_path: str) -> Set[str]:
+    """マニフェストが参照するレコードファイル名（読めない場合は空）"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            index = json.load(f).get('copywriters', {})
+    except (OSError, ValueError):
+        return set()
+    return {entry['file'] for entry in index.values() if 'file' in entry}
+
+
+def write_sharded_analysis(report: Dict, directory: str, analysis_version: Optional[str] = None) -> str:
+    """分析レポートをシャード形式で書き出し、マニフェストのパスを返す"""
+    records_dir = os.path.join(directory, RECORDS_DIRNAME)
+    os.makedirs(records_dir, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+    previous_files = _manifest_record_files(manifest_path)
+    
+    index = {}
+    for name, metrics in report.get('copywriter_analyses', {}).items():
+        data = json.dumps(metrics, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        filename = _record_filename(name, data)
+        record_path = os.path.join(records_dir, filename)
+        # 同じ内容のレコードは既に完全な形で存在する
+        if not os.path.exists(record_path):
+            _write_file_atomic(record_path, data)
+        index[name] = {
+            'file': filename,
+            'total_works': metrics.get('total_works', 0)
+        }
+    
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'analysis_version': analysis_version,
+        'export_date': datetime.now().isoformat(),
+        'copywriters': index
+    }
+    for key in SUMMARY_KEYS:
+        if key in report:
+            manifest[key] = report[key]
+    
+    # レコードを書き終えてからマニフェストを置き換える（読み込み側は常に完全なマニフェストを見る）
+    _write_file_atomic(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+    
+    # 現在と1世代前のマニフェストが参照しないレコードを削除
+    referenced = previous_files | {entry['file'] for entry in index.values()}
+    for filename in os.listdir(records_dir):
+        if filename not in referenced:
+            try:
+                os.remove(os.path.join(records_dir, filename))
+            except OSError as e:
+                logging.warning(f"Could not remove stale analysis record {filename}: {e}")
+    
+    return manifest_path
+
+
+class StyleAnalysisArtifact:
+    """スタイル分析結果の読み込み（シャード形式・単一JSON形式の両対応）
+
+    シャード形式ではマニフェストのみを読み込み、コピーライターの指標は load_metrics で都度読む。
+    単一JSON形式では従来通り全体を読み込む。
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.directory = None
+        self._analyses = None
+        
+        manifest_path = os.path.join(path, MANIFEST_FILENAME) if os.path.isdir(path) else path
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        if 'format_version' in data:
+            if data['format_version'] > ARTIFACT_FORMAT_VERSION:
+                raise ValueError(f"Unsupported analysis artifact format: {data['format_version']}")
+            self.directory = os.path.dirname(os.path.abspath(manifest_path))
+            self.index = data['copywriters']
+            self.analysis_version = data.get('analysis_version')
+        else:
+            # 単一JSON形式
+            self._analyses = data.get('copywriter_analyses', {})
+            self.index = {
+                name: {'total_works': metrics.get('total_works', 0)}
+                for name, metrics in self._analyses.items()
+            }
+            self.analysis_version = None
+        
+        self.summary = {key: data[key] for key in SUMMARY_KEYS if key in data}
+        
+        # 読み込んだレコード数（遅延読み込みの確認用）
+        self.records_loaded = 0
+    
+    @property
+    def sharded(self) -> bool:
+        return self._analyses is None
+    
+    def writers(self) -> List[str]:
+        """分析済みコピーライター一覧（マニフェストのみ参照）"""
+        return list(self.index)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def load_metrics(self, name: str) -> Optional[Dict]:
+        """コピーライターのスタイル指標を読み込む"""
+        entry = self.index.get(name)
+        if entry is None:
+            return None
+        
+        self.records_loaded += 1
+        if not self.sharded:
+            return self._analyses[name]
+        
+        record_path = os.path.join(self.directory, RECORDS_DIRNAME, entry['file'])
+        try:
+            with open(record_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            logging.error(f"Analysis record missing for {name}: {record_path}")
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logging.error(f"Analysis record unreadable for {name}: {record_path}: {e}")
+            return None
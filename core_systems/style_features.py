@@ -0,0 +1,121 @@
+"""
+Corpus Style Feature Matrix
+コーパス全体のスタイル特徴行列
+
+全作品の数値特徴（文字数・文数・感情語有無・句読点数・年）を1作品1行の行列に
+まとめ、コピーライター単位の部分集計をNumPyのグループ演算で一括計算する
+"""
+
+import numpy as np
+from typing import Dict, List, Sequence, Tuple
+
+# 集計対象の句読点
+PUNCTUATION_MARKS = ('。', '、', '！', '？', '〜')
+
+# 特徴行列の列
+FEATURE_COLUMNS = ('length', 'sentence_count', 'emotional', 'year') + PUNCTUATION_MARKS
+
+# 年が未設定の作品を表す値
+MISSING_YEAR = 0
+
+
+class CorpusFeatureMatrix:
+    """1作品1行の特徴行列（同じコピーライターの行は連続して並ぶ）"""
+    
+    def __init__(self, writers: List[str], group_sizes: np.ndarray, features: np.ndarray):
+        self.writers = writers
+        self.group_sizes = group_sizes
+        self.features = features
+        
+        # 各グループの先頭行
+        self.group_starts = np.zeros(len(writers), dtype=np.int64)
+        if len(writers) > 1:
+            np.cumsum(group_sizes[:-1], out=self.group_starts[1:])
+        self.group_ids = np.repeat(np.arange(len(writers)), group_sizes)
+    
+    @classmethod
+    def build(cls, grouped: Dict[str, Tuple[Sequence[Dict], Sequence]]) -> 'CorpusFeatureMatrix':
+        """コピーライター → (作品一覧, CopyAnalysis一覧) から特徴行列を構築"""
+        writers = [writer for writer, (works, _) in grouped.items() if works]
+        group_sizes = np.array([len(grouped[writer][0]) for writer in writers], dtype=np.int64)
+        
+        texts = []
+        rows = []
+        for writer in writers:
+            works, analyses = grouped[writer]
+            for work, analysis in zip(works, analyses):
+                texts.append(work['copy_text'])
+                rows.append((
+                    analysis.length,
+                    analysis.sentence_count,
+                    1 if analysis.emotional_words else 0,
+                    work['year'] or MISSING_YEAR
+                ))
+        
+        features = np.zeros((len(texts), len(FEATURE_COLUMNS)), dtype=np.int64)
+        if texts:
+            features[:, :4] = np.array(rows, dtype=np.int64)
+            features[:, 4:] = cls._count_characters(texts, features[:, 0], PUNCTUATION_MARKS)
+        
+        return cls(writers, group_sizes, features)
+    
+    @staticmethod
+    def _count_characters(texts: List[str], lengths: np.ndarray, marks: Sequence[str]) -> np.ndarray:
+        """全テキストを連結したコードポイント配列上で、作品ごとの文字出現数を数える"""
+        codes = np.frombuffer(''.join(texts).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        row_ids = np.repeat(np.arange(len(texts)), lengths)
+        
+        counts = np.zeros((len(texts), len(marks)), dtype=np.int64)
+        for j, mark in enumerate(marks):
+            counts[:, j] = np.bincount(row_ids[codes == ord(mark)], minlength=len(texts))
+        return counts
+    
+    def column(self, name: str) -> np.ndarray:
+        """列を取得"""
+        return self.features[:, FEATURE_COLUMNS.index(name)]
+    
+    def group_sums(self) -> np.ndarray:
+        """コピーライターごとの列合計"""
+        if not self.writers:
+            return np.zeros((0, len(FEATURE_COLUMNS)), dtype=np.int64)
+        return np.add.reduceat(self.features, self.group_starts, axis=0)
+    
+    def group_ranges(self, name: str, missing: int = MISSING_YEAR) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """コピーライターごとの (最小値, 最大値, 有効値の有無)。missingの値は除外"""
+        values = self.column(name)
+        valid = values != missing
+        info = np.iinfo(np.int64)
+        minimums = np.minimum.reduceat(np.where(valid, values, info.max), self.group_starts)
+        maximums = np.maximum.reduceat(np.where(valid, values, info.min), self.group_starts)
+        has_values = np.add.reduceat(valid.astype(np.int64), self.group_starts) > 0
+        return minimums, maximums, has_values
+    
+    def group_length_histograms(self) -> List[Dict[int, int]]:
+        """コピーライターごとの文字数ヒストグラム"""
+        lengths = self.column('length')
+        pairs, counts = np.unique(np.stack([self.group_ids, lengths], axis=1), axis=0, return_counts=True)
+        histograms = [{} for _ in self.writers]
+        for (group, length), count in zip(pairs.tolist(), counts.tolist()):
+            histograms[group][length] = count
+        return histograms
+    
+    def group_partials(self) -> Dict[str, Dict]:
+        """StyleAccumulator.add_numeric に渡すコピーライター単位の部分集計"""
+        if not self.writers:
+            return {}
+        
+        sums = self.group_sums()
+        histograms = self.group_length_histograms()
+        first_years, last_years, has_years = self.group_ranges('year')
+        sum_columns = [(j, name) for j, name in enumerate(FEATURE_COLUMNS) if name != 'year']
+        
+        partials = {}
+        for g, writer in enumerate(self.writers):
+            partials[writer] = {
+                'works_count': int(self.group_sizes[g]),
+                'sums': {name: int(sums[g, j]) for j, name in sum_columns},
+                'length_histogram': histograms[g],
+                'year_range': (int(first_years[g]), int(last_years[g])) if has_years[g] else None
+            }
+        
+        return partials
@@ -11,15 +11,18 @@ import time
 import json
 import re
 import csv
+import hashlib
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from urllib.parse import urljoin, parse_qs, urlparse
 from bs4 import BeautifulSoup
 import logging
 from datetime import datetime
-import sqlite3
 import os
 
+from copy_database import get_copy_database
+from shard_naming import writer_file_stem
+
 # ログ設定
 logging.basicConfig(
     level=logging.INFO,
@@ -30,6 +33,24 @@ logging.basicConfig(
     ]
 )
 
+# 統計のファセット列（copy_works列名 → copywriter_stats列名）
+STAT_FACETS = {
+    'year': 'active_years',
+    'industry': 'industries',
+    'media_type': 'media_types'
+}
+
+# エクスポート列定義
+WORK_COLUMNS = [
+    'entry_id', 'copy_text', 'copywriter', 'client', 'industry',
+    'media_type', 'year', 'award', 'page_ref', 'url', 'scraped_at'
+]
+STATS_COLUMNS = [
+    'name', 'works_count', 'awards_count', 'active_years',
+    'industries', 'media_types', 'updated_at'
+]
+EXPORT_BATCH_SIZE = 1000
+
 @dataclass
 class CopyWork:
     """コピー作品データ構造"""
@@ -97,7 +118,15 @@ class TCCDataScraper:
     def init_database(self):
         """SQLiteデータベース初期化"""
         self.db_path = '/Users/naoki/tcc_copyworks.db'
-        conn = sqlite3.connect(self.db_path)
+        self.db = get_copy_database(self.db_path)
+        
+        with self.db.writer() as conn:
+            self._create_tables(conn)
+        
+        logging.info("Database initialized")
+    
+    def _create_tables(self, conn):
+        """テーブル作成"""
         cursor = conn.cursor()
         
         # コピー作品テーブル
@@ -116,6 +145,10 @@ class TCCDataScraper:
                 scraped_at TEXT
             )
         ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_copy_works_copywriter
+            ON copy_works (copywriter)
+        ''')
         
         # コピーライター統計テーブル
         cursor.execute('''
@@ -130,9 +163,107 @@ class TCCDataScraper:
             )
         ''')
         
-        conn.commit()
-        conn.close()
-        logging.info("Database initialized")
+        # ファセット値ごとの作品数（DISTINCT集合を増分更新で維持するため）
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'copywriter_stat_facets'"
+        )
+        facets_existed = cursor.fetchone() is not None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS copywriter_stat_facets (
+                name TEXT NOT NULL,
+                facet TEXT NOT NULL,
+                value,
+                works_count INTEGER NOT NULL,
+                PRIMARY KEY (name, facet, value)
+            )
+        ''')
+        
+        # 既存DBの初回移行時のみ全件集計で統計を初期化
+        if not facets_existed:
+            self._rebuild_copywriter_statistics(cursor)
+    
+    def _apply_stats_delta(self, cursor, work: Tuple, sign: int):
+        """1作品分の増減（sign=+1/-1）をコピーライター統計へ反映"""
+        copywriter, award = work[0], work[-1]
+        facet_values = dict(zip(STAT_FACETS, work[1:-1]))
+        
+        cursor.execute('''
+            INSERT OR IGNORE INTO copywriter_stats (name, works_count, awards_count)
+            VALUES (?, 0, 0)
+        ''', (copywriter,))
+        cursor.execute('''
+            UPDATE copywriter_stats
+            SET works_count = works_count + ?, awards_count = awards_count + ?
+            WHERE name = ?
+        ''', (sign, sign if award is not None else 0, copywriter))
+        
+        for facet, value in facet_values.items():
+            if value is None:
+                continue
+            cursor.execute('''
+                INSERT OR IGNORE INTO copywriter_stat_facets (name, facet, value, works_count)
+                VALUES (?, ?, ?, 0)
+            ''', (copywriter, facet, value))
+            cursor.execute('''
+                UPDATE copywriter_stat_facets SET works_count = works_count + ?
+                WHERE name = ? AND facet = ? AND value = ?
+            ''', (sign, copywriter, facet, value))
+        
+        cursor.execute(
+            "DELETE FROM copywriter_stat_facets WHERE name = ? AND works_count <= 0",
+            (copywriter,)
+        )
+        cursor.execute(
+            "DELETE FROM copywriter_stats WHERE name = ? AND works_count <= 0",
+            (copywriter,)
+        )
+        self._refresh_stats_summary(cursor, copywriter)
+    
+    def _refresh_stats_summary(self, cursor, copywriter: Optional[str] = None):
+        """ファセット表から統計の集合列を再構成（指定時はそのコピーライターのみ）"""
+        summary_columns = ',\n'.join(
+            f'''{column} = (
+                SELECT GROUP_CONCAT(value) FROM (
+                    SELECT value FROM copywriter_stat_facets
+                    WHERE name = copywriter_stats.name AND facet = '{facet}'
+                    ORDER BY value
+                )
+            )'''
+            for facet, column in STAT_FACETS.items()
+        )
+        where_clause = "WHERE name = ?" if copywriter is not None else ""
+        params = (datetime.now().isoformat(),) + ((copywriter,) if copywriter is not None else ())
+        
+        cursor.execute(f'''
+            UPDATE copywriter_stats SET
+                {summary_columns},
+                updated_at = ?
+            {where_clause}
+        ''', params)
+    
+    def _rebuild_copywriter_statistics(self, cursor):
+        """copy_works全件からコピーライター統計を再構築"""
+        cursor.execute("DELETE FROM copywriter_stat_facets")
+        cursor.execute("DELETE FROM copywriter_stats")
+        
+        for facet in STAT_FACETS:
+            cursor.execute(f'''
+                INSERT INTO copywriter_stat_facets (name, facet, value, works_count)
+                SELECT copywriter, ?, {facet}, COUNT(*)
+                FROM copy_works
+                WHERE {facet} IS NOT NULL
+                GROUP BY copywriter, {facet}
+            ''', (facet,))
+        
+        cursor.execute('''
+            INSERT INTO copywriter_stats (name, works_count, awards_count)
+            SELECT copywriter, COUNT(*), COUNT(award)
+            FROM copy_works
+            GROUP BY copywriter
+        ''')
+        
+        self._refresh_stats_summary(cursor)
     
     def respect_rate_limit(self):
         """レート制限を尊重した待機"""
@@ -255,36 +386,48 @@ class TCCDataScraper:
     
     def save_work_to_db(self, work_data: Dict):
         """作品データをデータベースに保存"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        stats_query = '''
+            SELECT copywriter, year, industry, media_type, award
+            FROM copy_works WHERE entry_id = ?
+        '''
+        entry_id = work_data.get('entry_id', '')
         
         try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO copy_works 
-                (entry_id, copy_text, copywriter, client, industry, 
-                 media_type, year, award, page_ref, url, scraped_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                work_data.get('entry_id', ''),
-                work_data.get('copy_text', ''),
-                work_data.get('copywriter', ''),
-                work_data.get('client', ''),
-                work_data.get('industry', ''),
-                work_data.get('media_type', ''),
-                work_data.get('year'),
-                work_data.get('award'),
-                work_data.get('page_ref'),
-                work_data.get('url', ''),
-                datetime.now().isoformat()
-            ))
+            with self.db.writer() as conn:
+                cursor = conn.cursor()
+                
+                # 置き換えられる既存作品を統計から差し引く
+                previous = cursor.execute(stats_query, (entry_id,)).fetchone()
+                if previous is not None:
+                    self._apply_stats_delta(cursor, previous, -1)
+                
+                cursor.execute('''
+                    INSERT OR REPLACE INTO copy_works 
+                    (entry_id, copy_text, copywriter, client, industry, 
+                     media_type, year, award, page_ref, url, scraped_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    entry_id,
+                    work_data.get('copy_text', ''),
+                    work_data.get('copywriter', ''),
+                    work_data.get('client', ''),
+                    work_data.get('industry', ''),
+                    work_data.get('media_type', ''),
+                    work_data.get('year'),
+                    work_data.get('award'),
+                    work_data.get('page_ref'),
+                    work_data.get('url', ''),
+                    datetime.now().isoformat()
+                ))
+                
+                # 保存した作品を統計に加算
+                current = cursor.execute(stats_query, (entry_id,)).fetchone()
+                self._apply_stats_delta(cursor, current, +1)
             
-            conn.commit()
             logging.info(f"Saved work: {work_data.get('entry_id', 'unknown')}")
             
         except Exception as e:
             logging.error(f"Database save error: {e}")
-        finally:
-            conn.close()
     
     def collect_all_copywriter_data(self):
         """全対象コピーライターのデータ収集"""
@@ -314,82 +457,159 @@ class TCCDataScraper:
         logging.info(f"Data collection completed. Total works: {total_works}")
         return total_works
     
-    def generate_copywriter_statistics(self):
-        """コピーライター統計情報生成"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def generate_copywriter_statistics(self, rebuild: bool = False):
+        """コピーライター統計情報生成
         
-        # 各コピーライターの統計を計算
-        cursor.execute('''
-            SELECT 
-                copywriter,
-                COUNT(*) as works_count,
-                COUNT(CASE WHEN award IS NOT NULL THEN 1 END) as awards_count,
-                GROUP_CONCAT(DISTINCT year) as years,
-                GROUP_CONCAT(DISTINCT industry) as industries,
-                GROUP_CONCAT(DISTINCT media_type) as media_types
-            FROM copy_works 
-            GROUP BY copywriter
-        ''')
+        統計は save_work_to_db で作品ごとに増分更新されるため通常は何もしない。
+        rebuild=True の場合のみ copy_works 全件から再構築する。
+        """
+        if rebuild:
+            with self.db.writer() as conn:
+                self._rebuild_copywriter_statistics(conn.cursor())
+            logging.info("Copywriter statistics rebuilt")
+        else:
+            logging.info("Copywriter statistics are up to date (maintained incrementally)")
+    
+    def get_copywriter_statistics(self, name: str) -> Optional[Dict]:
+        """コピーライター統計取得"""
+        with self.db.reader() as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(STATS_COLUMNS)} FROM copywriter_stats WHERE name = ?",
+                (name,)
+            ).fetchone()
         
-        stats = cursor.fetchall()
+        if row is None:
+            return None
         
-        for stat in stats:
-            cursor.execute('''
-                INSERT OR REPLACE INTO copywriter_stats
-                (name, works_count, awards_count, active_years, industries, media_types, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (*stat, datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
-        
-        logging.info("Copywriter statistics updated")
-    
-    def export_collected_data(self):
-        """収集データのエクスポート"""
-        conn = sqlite3.connect(self.db_path)
-        
-        # CSV エクスポート
-        works_df = sqlite3.connect(self.db_path).execute(
-            "SELECT * FROM copy_works"
-        ).fetchall()
-        
-        with open('/Users/naoki/tcc_copyworks.csv', 'w', encoding='utf-8', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                'entry_id', 'copy_text', 'copywriter', 'client', 'industry',
-                'media_type', 'year', 'award', 'page_ref', 'url', 'scraped_at'
-            ])
-            writer.writerows(works_df)
-        
-        # JSON エクスポート
-        stats_df = conn.execute("SELECT * FROM copywriter_stats").fetchall()
-        
-        export_data = {
-            'collection_info': {
-                'total_works': len(works_df),
-                'total_copywriters': len(stats_df),
+        return dict(zip(STATS_COLUMNS, row))
+    
+    def export_collected_data(self, output_dir: str = '/Users/naoki',
+                              formats: Tuple[str, ...] = ('csv', 'json'),
+                              shard_by_copywriter: bool = False) -> Dict:
+        """収集データのエクスポート
+        
+        カーソルから1行ずつ書き出すため、作品数に関わらずメモリ使用量は一定。
+        formats には 'csv' / 'json' / 'jsonl' を指定できる。
+        shard_by_copywriter=True でコピーライター別のJSONLファイルも出力する。
+        """
+        files = []
+        
+        with self.db.reader() as conn:
+            # 全出力を同一スナップショットから書き出す
+            conn.execute("BEGIN")
+            
+            collection_info = {
+                'total_works': conn.execute("SELECT COUNT(*) FROM copy_works").fetchone()[0],
+                'total_copywriters': conn.execute("SELECT COUNT(*) FROM copywriter_stats").fetchone()[0],
                 'export_date': datetime.now().isoformat(),
                 'source': 'TCC (Tokyo Copywriters Club)'
-            },
-            'works': [dict(zip([
-                'entry_id', 'copy_text', 'copywriter', 'client', 'industry',
-                'media_type', 'year', 'award', 'page_ref', 'url', 'scraped_at'
-            ], work)) for work in works_df],
-            'copywriter_stats': [dict(zip([
-                'name', 'works_count', 'awards_count', 'active_years', 
-                'industries', 'media_types', 'updated_at'
-            ], stat)) for stat in stats_df]
+            }
+            
+            # CSV エクスポート
+            if 'csv' in formats:
+                path = os.path.join(output_dir, 'tcc_copyworks.csv')
+                with open(path, 'w', encoding='utf-8', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(WORK_COLUMNS)
+                    writer.writerows(self._iter_works(conn))
+                files.append(path)
+            
+            # JSONL エクスポート（1行1作品）
+            if 'jsonl' in formats:
+                path = os.path.join(output_dir, 'tcc_copyworks.jsonl')
+                with open(path, 'w', encoding='utf-8') as f:
+                    for work in self._iter_works(conn):
+                        f.write(json.dumps(dict(zip(WORK_COLUMNS, work)), ensure_ascii=False) + '\n')
+                files.append(path)
+            
+            # JSON エクスポート
+            if 'json' in formats:
+                path = os.path.join(output_dir, 'tcc_complete_dataset.json')
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write('{\n  "collection_info": ')
+                    f.write(json.dumps(collection_info, ensure_ascii=False))
+                    f.write(',\n  "works": [')
+                    self._write_json_array(f, WORK_COLUMNS, self._iter_works(conn))
+                    f.write('],\n  "copywriter_stats": [')
+                    self._write_json_array(f, STATS_COLUMNS, conn.execute(
+                        f"SELECT {', '.join(STATS_COLUMNS)} FROM copywriter_stats"
+                    ))
+                    f.write(']\n}\n')
+                files.append(path)
+            
+            # コピーライター別シャード
+            if shard_by_copywriter:
+                shard_dir = os.path.join(output_dir, 'tcc_copyworks_by_copywriter')
+                files.append(self._export_copywriter_shards(conn, shard_dir))
+        
+        logging.info("Data export completed")
+        return {
+            'collection_info': collection_info,
+            'files': files
         }
+    
+    def _iter_works(self, conn, order_by: Optional[str] = None):
+        """作品行をカーソルから逐次取得"""
+        query = f"SELECT {', '.join(WORK_COLUMNS)} FROM copy_works"
+        if order_by:
+            query += f" ORDER BY {order_by}"
+        
+        cursor = conn.execute(query)
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+    
+    def _write_json_array(self, f, columns: List[str], rows):
+        """行をJSON配列要素として逐次書き出し"""
+        separator = '\n    '
+        for row in rows:
+            f.write(separator + json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+            separator = ',\n    '
+        if separator != '\n    ':
+            f.write('\n  ')
+    
+    def _export_copywriter_shards(self, conn, shard_dir: str) -> str:
+        """コピーライター別JSONLシャードとインデックスを出力"""
+        os.makedirs(shard_dir, exist_ok=True)
+        
+        index = {}
+        current_name = None
+        shard = None
         
-        with open('/Users/naoki/tcc_complete_dataset.json', 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, ensure_ascii=False, indent=2)
+        try:
+            # copywriter順に読むことで同時に開くファイルは常に1つ
+            for work in self._iter_works(conn, order_by='copywriter'):
+                name = work[WORK_COLUMNS.index('copywriter')]
+                if name != current_name:
+                    if shard:
+                        shard.close()
+                    filename = self._shard_filename(name)
+                    shard = open(os.path.join(shard_dir, filename), 'w', encoding='utf-8')
+                    index[name] = {'file': filename, 'works_count': 0}
+                    current_name = name
+                
+                shard.write(json.dumps(dict(zip(WORK_COLUMNS, work)), ensure_ascii=False) + '\n')
+                index[name]['works_count'] += 1
+        finally:
+            if shard:
+                shard.close()
         
-        conn.close()
+        index_path = os.path.join(shard_dir, 'index.json')
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'export_date': datetime.now().isoformat(),
+                'columns': WORK_COLUMNS,
+                'copywriters': index
+            }, f, ensure_ascii=False, indent=2)
         
-        logging.info("Data export completed")
-        return export_data
+        return index_path
+    
+    @staticmethod
+    def _shard_filename(name: str) -> str:
+        """コピーライター名からシャードファイル名を生成"""
+        return f"{writer_file_stem(name)}.jsonl"
 
 # デモ実行（倫理的制約を考慮したサンプル）
 def run_ethical_demo():
@@ -445,8 +665,8 @@ def run_ethical_demo():
     print(f"Total works in demo: {export_data['collection_info']['total_works']}")
     print(f"Files created:")
     print(f"  - {scraper.db_path}")
-    print(f"  - /Users/naoki/tcc_copyworks.csv")
-    print(f"  - /Users/naoki/tcc_complete_dataset.json")
+    for path in export_data['files']:
+        print(f"  - {path}")
     
     return export_data
 
@@ -0,0 +1,309 @@
+"""
+Tokenizer Service
+共有トークナイザーサービス
+
+MeCab（利用できない場合は正規表現）による分かち書き結果をテキスト単位でメモ化し、
+スタイル分析・独自性スコア・ペルソナ構築の各処理で同じテキストを再トークナイズしない
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from copy_database import get_copy_database
+
+try:
+    import MeCab
+    MECAB_AVAILABLE = True
+except ImportError:
+    MECAB_AVAILABLE = False
+
+# 日本語文字（ひらがな・カタカナ・長音・漢字）の連続
+WORD_PATTERN = re.compile(r'[ぁ-んァ-ヶー一-龠]+')
+
+# 特徴的表現として切り出す文字数の範囲
+EXPRESSION_MIN_LENGTH = 2
+EXPRESSION_MAX_LENGTH = 6
+
+# メモリ上のLRUに保持するテキスト数
+DEFAULT_MAX_ENTRIES = 100000
+
+# SQLiteのバインド変数上限を超えないための一括取得サイズ
+LOOKUP_BATCH_SIZE = 500
+
+# トークナイズ結果の形式バージョン（変更時に上げると永続キャッシュが無効化される）
+TOKENIZER_VERSION = 2
+
+# MeCab素性（IPA辞書形式）の品詞・原形の位置
+FEATURE_POS_INDEX = 0
+FEATURE_BASE_FORM_INDEX = 6
+
+# BOS/EOSノードの種別
+MECAB_BOS_NODE = 2
+MECAB_EOS_NODE = 3
+
+# キーワード候補とする内容語の品詞
+CONTENT_POS = ('名詞', '動詞', '形容詞')
+
+
+@dataclass
+class TokenizedText:
+    """1テキスト分のトークナイズ結果（MeCabの1回のノード走査から作成）"""
+    # 表層形（MeCab無効時は日本語文字の連続）
+    words: List[str]
+    # 日本語文字の連続（MeCabの有無によらず同じ）
+    runs: List[str]
+    # 品詞（wordsと同じ長さ、MeCab無効時は空）
+    pos: List[str] = field(default_factory=list)
+    # 原形（wordsと同じ長さ、MeCab無効時は表層形と同じ）
+    base_forms: List[str] = field(default_factory=list)
+    
+    @property
+    def has_pos(self) -> bool:
+        """品詞情報を持つか"""
+        return bool(self.pos)
+    
+    def content_words(self) -> List[str]:
+        """内容語（名詞・動詞・形容詞）の原形（品詞情報が無い場合は表層形すべて）"""
+        if not self.has_pos:
+            return self.words
+        return [
+            base for base, pos in zip(self.base_forms, self.pos)
+            if pos in CONTENT_POS
+        ]
+    
+    def has_lemma(self, lemma: str, pos: Optional[str] = None) -> bool:
+        """指定の原形（と品詞）の語を含むか"""
+        if pos is None:
+            return lemma in self.base_forms
+        return any(
+            base == lemma and word_pos == pos
+            for base, word_pos in zip(self.base_forms, self.pos)
+        )
+    
+    def expressions(self) -> List[str]:
+        """2〜6文字の特徴的表現（re.findall(r'[ぁ-んァ-ヶー一-龠]{2,6}') と同じ結果）"""
+        expressions = []
+        for run in self.runs:
+            for i in range(0, len(run), EXPRESSION_MAX_LENGTH):
+                piece = run[i:i + EXPRESSION_MAX_LENGTH]
+                if len(piece) >= EXPRESSION_MIN_LENGTH:
+                    expressions.append(piece)
+        return expressions
+
+
+# プロセス内で共有するMeCabタガー（fork後の共有を避けるためPIDも鍵に含める）
+_taggers: Dict[Tuple[int, str], object] = {}
+_taggers_lock = threading.Lock()
+
+
+def get_mecab_tagger(option: str = ''):
+    """オプションごとの共有MeCabタガーを取得（利用できない場合はNone）"""
+    if not MECAB_AVAILABLE:
+        return None
+    
+    key = (os.getpid(), option)
+    with _taggers_lock:
+        if key not in _taggers:
+            try:
+                _taggers[key] = MeCab.Tagger(option)
+                print("MeCab initialized successfully")
+            except Exception:
+                _taggers[key] = None
+                print("MeCab initialization failed, using fallback")
+        return _taggers[key]
+
+
+class TokenizerService:
+    """テキスト単位でメモ化するトークナイザー（LRU + 任意の永続層）"""
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, cache_path: Optional[str] = None,
+                 use_mecab: bool = True):
+        self.max_entries = max_entries
+        self.cache_path = cache_path
+        self.use_mecab = use_mecab
+        
+        self._tagger = None
+        self._tagger_loaded = False
+        
+        self._memo: 'OrderedDict[str, TokenizedText]' = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        
+        # 永続層（オプション）
+        self.db = None
+        if cache_path:
+            self.db = get_copy_database(cache_path)
+            with self.db.writer() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS tokenizer_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        tokens TEXT NOT NULL,
+                        created_at TEXT
+                    )
+                ''')
+    
+    @property
+    def tagger(self):
+        """MeCabタガー（初回アクセス時に取得）"""
+        if not self._tagger_loaded:
+            self._tagger = get_mecab_tagger() if self.use_mecab else None
+            self._tagger_loaded = True
+        return self._tagger
+    
+    @property
+    def version_tag(self) -> str:
+        """トークナイズ結果を左右する設定"""
+        return f"v{TOKENIZER_VERSION}:{'mecab' if self.tagger else 'regex'}"
+    
+    def _make_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.version_tag}\0{text}".encode('utf-8')).hexdigest()
+    
+    def _compute(self, text: str) -> TokenizedText:
+        """1テキストをトークナイズ（MeCabはノードを1回走査して表層形・品詞・原形を同時に取得）"""
+        runs = WORD_PATTERN.findall(text)
+        if not self.tagger:
+            return TokenizedText(words=list(runs), runs=runs, base_forms=list(runs))
+        
+        words, pos, base_forms = [], [], []
+        node = self.tagger.parseToNode(text)
+        while node:
+            if node.stat not in (MECAB_BOS_NODE, MECAB_EOS_NODE) and node.surface:
+                features = node.feature.split(',')
+                base_form = (
+                    features[FEATURE_BASE_FORM_INDEX]
+                    if len(features) > FEATURE_BASE_FORM_INDEX else '*'
+                )
+                words.append(node.surface)
+                pos.append(features[FEATURE_POS_INDEX])
+                # 未知語などで原形が無い場合は表層形を使う
+                base_forms.append(node.surface if base_form == '*' else base_form)
+            node = node.next
+        
+        return TokenizedText(words=words, runs=runs, pos=pos, base_forms=base_forms)
+    
+    def _remember(self, text: str, tokens: TokenizedText):
+        """LRUに登録（上限を超えたら最も古いものを破棄）"""
+        self._memo[text] = tokens
+        self._memo.move_to_end(text)
+        while len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
+    
+    def _load_persistent(self, texts: List[str]) -> Dict[str, TokenizedText]:
+        """永続層から一括取得"""
+        keys = {self._make_key(text): text for text in texts}
+        key_list = list(keys)
+        found = {}
+        
+        with self.db.reader() as conn:
+            for i in range(0, len(key_list), LOOKUP_BATCH_SIZE):
+                batch = key_list[i:i + LOOKUP_BATCH_SIZE]
+                placeholders = ', '.join('?' * len(batch))
+                for cache_key, tokens in conn.execute(
+                    f"SELECT cache_key, tokens FROM tokenizer_cache WHERE cache_key IN ({placeholders})",
+                    batch
+                ):
+                    found[keys[cache_key]] = TokenizedText(**json.loads(tokens))
+        
+        return found
+    
+    def _store_persistent(self, computed: Dict[str, TokenizedText]):
+        """永続層へ一括保存"""
+        created_at = datetime.now().isoformat()
+        with self.db.writer() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO tokenizer_cache (cache_key, tokens, created_at) VALUES (?, ?, ?)",
+                [
+                    (self._make_key(text), json.dumps(asdict(tokens), ensure_ascii=False), created_at)
+                    for text, tokens in computed.items()
+                ]
+            )
+    
+    def tokenize(self, text: str) -> TokenizedText:
+        """1テキストのトークナイズ結果（メモ化済みなら再計算しない）"""
+        with self._lock:
+            tokens = self._memo.get(text)
+            if tokens is not None:
+                self._memo.move_to_end(text)
+                self.hits += 1
+                return tokens
+        return self.tokenize_many([text])[0]
+    
+    def tokenize_many(self, texts: Iterable[str]) -> List[TokenizedText]:
+        """複数テキストを一括トークナイズ（未処理のテキストだけを1回ずつ計算）"""
+        texts = list(texts)
+        results: Dict[str, TokenizedText] = {}
+        pending = []
+        
+        with self._lock:
+            for text in texts:
+                if text in results:
+                    continue
+                tokens = self._memo.get(text)
+                if tokens is not None:
+                    self._memo.move_to_end(text)
+                    self.hits += 1
+                    results[text] = tokens
+                else:
+                    results[text] = None
+                    pending.append(text)
+        
+        if pending:
+            # 永続層 → 計算の順に解決
+            loaded = self._load_persistent(pending) if self.db is not None else {}
+            computed = {}
+            for text in pending:
+                if text in loaded:
+                    results[text] = loaded[text]
+                else:
+                    results[text] = computed[text] = self._compute(text)
+            
+            if computed and self.db is not None:
+                self._store_persistent(computed)
+            
+            with self._lock:
+                self.persistent_hits += len(loaded)
+                self.misses += len(computed)
+                for text in pending:
+                    self._remember(text, results[text])
+        
+        return [results[text] for text in texts]
+    
+    def get_statistics(self) -> Dict:
+        """メモ化のヒット率"""
+        total = self.hits + self.persistent_hits + self.misses
+        return {
+            'entries': len(self._memo),
+            'hits': self.hits,
+            'persistent_hits': self.persistent_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.persistent_hits) / total if total > 0 else 0.0
+        }
+    
+    def clear(self):
+        """メモリ上のメモを破棄"""
+        with self._lock:
+            self._memo.clear()
+
+
+# プロセス内で共有するサービス
+_services: Dict[Tuple[int, Optional[str]], TokenizerService] = {}
+_services_lock = threading.Lock()
+
+
+def get_tokenizer_service(cache_path: Optional[str] = None, **kwargs) -> TokenizerService:
+    """永続層のパスごとの共有TokenizerServiceを取得"""
+    key = (os.getpid(), os.path.abspath(cache_path) if cache_path else None)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = TokenizerService(cache_path=cache_path, **kwargs)
+        return _services[key]